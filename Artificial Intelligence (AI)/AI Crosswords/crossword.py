@@ -1,3 +1,6 @@
+import wordcache
+
+
 class Variable():
 
     ACROSS = "across"
@@ -57,9 +60,15 @@ class Crossword():
                         row.append(False)
                 self.structure.append(row)
 
-        # Save vocabulary list
-        with open(words_file) as f:
-            self.words = set(f.read().upper().splitlines())
+        # Save vocabulary list, with the words of each length getting bit
+        # positions in their own bitsets, and each (length, position)
+        # mapping every letter to the bitset of the words with it there;
+        # this comes precompiled from a cache next to the words file
+        self.vocabulary = wordcache.load(words_file)
+        self.words = self.vocabulary.words
+        self.words_by_length = self.vocabulary.words_by_length
+        self.length_masks = self.vocabulary.length_masks
+        self.letter_masks = self.vocabulary.letter_masks
 
         # Determine variable set
         self.variables = set()
@@ -104,30 +113,71 @@ class Crossword():
                             length=length
                         ))
 
+        # Number variables in reading order, so each has an integer id
+        # indexing `self.variable_list`
+        self.variable_list = sorted(
+            self.variables, key=lambda v: (v.i, v.j, v.direction)
+        )
+        for index, variable in enumerate(self.variable_list):
+            variable.id = index
+
+        # Index which variables cover each cell, and where in each word
+        cells = dict()
+        for variable in self.variable_list:
+            for k, cell in enumerate(variable.cells):
+                cells.setdefault(cell, []).append((variable, k))
+
         # Compute overlaps for each word
         # For any pair of variables v1, v2, their overlap is either:
         #    None, if the two variables do not overlap; or
         #    (i, j), where v1's ith character overlaps v2's jth character
-        self.overlaps = dict()
-        for v1 in self.variables:
-            for v2 in self.variables:
-                if v1 == v2:
-                    continue
-                cells1 = v1.cells
-                cells2 = v2.cells
-                intersection = set(cells1).intersection(cells2)
-                if not intersection:
-                    self.overlaps[v1, v2] = None
-                else:
-                    intersection = intersection.pop()
-                    self.overlaps[v1, v2] = (
-                        cells1.index(intersection),
-                        cells2.index(intersection)
-                    )
+        # Only cells covered by two variables make overlaps, so just those
+        # pairs are stored and every other pair looks up as None
+        self.overlaps = Overlaps()
+        neighbors = [[] for _ in self.variable_list]
+        for covering in cells.values():
+            for v1, i in covering:
+                for v2, j in covering:
+                    if v1 is not v2:
+                        self.overlaps[v1, v2] = (i, j)
+                        neighbors[v1.id].append(v2)
+        self.neighbor_tuples = {
+            variable: tuple(sorted(neighbors[variable.id], key=lambda v: v.id))
+            for variable in self.variable_list
+        }
 
     def neighbors(self, var):
-        """Given a variable, return set of overlapping variables."""
-        return set(
-            v for v in self.variables
-            if v != var and self.overlaps[v, var]
-        )
+        """Given a variable, return tuple of overlapping variables."""
+        return self.neighbor_tuples[var]
+
+    def length_mask(self, length):
+        """Return bitset of every word of the given length."""
+        return self.length_masks.get(length, 0)
+
+    def letter_mask(self, length, position, letter):
+        """
+        Return bitset of the words of the given length that have `letter`
+        at `position`.
+        """
+        return self.letter_masks.get((length, position), {}).get(letter, 0)
+
+    def word_mask(self, word):
+        """Return bitset holding just `word`, among words of its length."""
+        return 1 << self.vocabulary.index(word)
+
+    def words_in(self, length, mask):
+        """Given a bitset over words of `length`, yield the words in it."""
+        words = self.words_by_length.get(length, [])
+        bits = bin(mask)[:1:-1] # Lowest bit first
+        index = bits.find("1")
+        while index != -1:
+            yield words[index]
+            index = bits.find("1", index + 1)
+
+
+class Overlaps(dict):
+    """Overlaps of pairs of variables, None for pairs that do not overlap."""
+
+    def __missing__(self, key):
+        return None
+
@@ -1,20 +1,175 @@
+import argparse
+import multiprocessing
+import queue
+import random
 import sys
+import traceback
+from collections import OrderedDict
+from itertools import count
 
 from crossword import *
 
+# Narrowing a domain by at most this many words updates its letter counts
+# word by word; narrowing it by more recounts them from the bitsets
+RECOUNT_LIMIT = 32
+
+# How many search nodes pass between progress reports
+PROGRESS_INTERVAL = 64
+
+# How many nogoods backjumping search remembers for each variable
+NOGOOD_LIMIT = 64
+
+# Seconds a portfolio waits for a result before checking its workers are alive
+POLL_INTERVAL = 0.5
+
+
+class RestartSearch(Exception):
+    """Raised inside a search once it has used up its node limit."""
+
 
 class CrosswordCreator():
 
     def __init__(self, crossword):
         """
         Create new CSP crossword generate.
+
+        Each domain is a bitset over the words of its variable's length
+        (see `Crossword.words_by_length`), so that set operations on
+        domains are single integer operations.
         """
         self.crossword = crossword
         self.domains = {
-            var: self.crossword.words.copy()
+            var: self.crossword.length_mask(var.length)
             for var in self.crossword.variables
         }
 
+        # For variables whose values have been ordered against, the size
+        # of the domain and, at each position another variable overlaps,
+        # how many of its words have each letter there
+        self.letter_counts = dict()
+
+        # While maintaining arc consistency, the list of (variable, domain,
+        # letter counts) triples recording each domain before it was
+        # narrowed, so that backtracking can undo the narrowing instead of
+        # copying domains
+        self.trail = None
+
+        # How to break ties between variables ("degree" or "random"), and
+        # the random.Random used for random tie-breaks and to shuffle words
+        # that rule out as much as each other, if any
+        self.tie_break = "degree"
+        self.random = None
+
+        # Search nodes visited and restarts made so far, the node count at
+        # which the current search restarts, and a function to call with the
+        # node count every PROGRESS_INTERVAL nodes
+        self.nodes = 0
+        self.restarts = 0
+        self.node_limit = None
+        self.progress = None
+
+        # For backjumping search: for each variable, the partial assignments
+        # (as frozensets of (variable, word) pairs) proven to leave it no
+        # word, most recently used last, along with counts of the nogoods
+        # reused and of the levels jumped over
+        self.nogoods = dict()
+        self.nogood_hits = 0
+        self.backjumps = 0
+
+    def count_node(self):
+        """
+        Count one search node, restarting the search if it hit its limit.
+        """
+        self.nodes += 1
+        if self.progress is not None and self.nodes % PROGRESS_INTERVAL == 0:
+            self.progress(self.nodes)
+        if self.node_limit is not None and self.nodes >= self.node_limit:
+            raise RestartSearch()
+
+    def restrict(self, var, domain):
+        """
+        Narrow the domain of `var` to `domain`, keeping its letter counts
+        up to date and recording the old domain on the trail if there is
+        one.
+        """
+        counts = self.letter_counts.get(var)
+        if self.trail is not None:
+            self.trail.append((var, self.domains[var], counts))
+        if counts is not None:
+            removed = self.domains[var] & ~domain
+            self.letter_counts[var] = self.narrow_counts(var, counts, removed, domain)
+        self.domains[var] = domain
+
+    def undo(self, mark):
+        """
+        Restore every domain narrowed since the trail had `mark` entries.
+        """
+        while len(self.trail) > mark:
+            var, domain, counts = self.trail.pop()
+            self.domains[var] = domain
+            if counts is None:
+                self.letter_counts.pop(var, None)
+            else:
+                self.letter_counts[var] = counts
+
+    def count_letters(self, var):
+        """
+        Return the (domain size, letter counts) of `var`, counting them
+        from its domain the first time they are needed.
+        """
+        counts = self.letter_counts.get(var)
+        if counts is None:
+            counts = self.recount(var, self.domains[var])
+            self.letter_counts[var] = counts
+        return counts
+
+    def recount(self, var, domain):
+        """
+        Return the (domain size, letter counts) of `var` for `domain`, with
+        one AND and popcount per letter at each overlapped position.
+        """
+        positions = dict()
+        for neighbor in self.crossword.neighbors(var):
+            i, _ = self.crossword.overlaps[var, neighbor]
+            if i in positions:
+                continue
+            letters = dict()
+            masks = self.crossword.letter_masks.get((var.length, i), {})
+            for letter, words in masks.items():
+                count = (domain & words).bit_count()
+                if count:
+                    letters[letter] = count
+            positions[i] = letters
+        return domain.bit_count(), positions
+
+    def narrow_counts(self, var, counts, removed, domain):
+        """
+        Return the (domain size, letter counts) of `var` after the words in
+        bitset `removed` are taken out of the domain with `counts`, leaving
+        `domain`.
+        """
+        removed_count = removed.bit_count()
+        if removed_count > RECOUNT_LIMIT:
+            return self.recount(var, domain)
+        size, positions = counts
+        positions = {i: letters.copy() for i, letters in positions.items()}
+        for word in self.crossword.words_in(var.length, removed):
+            for i, letters in positions.items():
+                letters[word[i]] -= 1
+        return size - removed_count, positions
+
+    def domain_words(self, var):
+        """
+        Return iterator over the words in the domain of `var`.
+        """
+        return self.crossword.words_in(var.length, self.domains[var])
+
+    def domain_size(self, var):
+        """
+        Return the number of words in the domain of `var`.
+        """
+        return self.domains[var].bit_count()
+
     def letter_grid(self, assignment):
         """
         Return 2D array representing a given assignment.
@@ -85,13 +240,54 @@ class CrosswordCreator():
 
         img.save(filename)
 
-    def solve(self):
+    def solve(self, mode="backtrack", restart_base=None):
         """
         Enforce node and arc consistency, and then solve the CSP.
+
+        `mode` is "backtrack" for plain backtracking search, "mac" to
+        maintain arc consistency after every assignment, or "cbj" for
+        conflict-directed backjumping with a cache of learned nogoods.
+
+        If `restart_base` is given, the search starts over whenever it has
+        visited that many nodes times the next term of the Luby sequence
+        (1, 1, 2, 1, 1, 2, 4, ...), which only helps if `self.random`
+        varies each attempt.
         """
+        if mode not in ("backtrack", "mac", "cbj"):
+            raise ValueError(f"unknown search mode: {mode}")
         self.enforce_node_consistency()
-        self.ac3()
-        return self.backtrack(dict())
+        if not self.ac3():
+            return None
+        if restart_base is None:
+            return self.search(mode)
+
+        domains = dict(self.domains)
+        for run in count(1):
+            self.node_limit = self.nodes + restart_base * luby(run)
+            try:
+                return self.search(mode)
+            except RestartSearch:
+                # Starting over from the domains as they were before searching
+                self.domains = dict(domains)
+                self.letter_counts = dict()
+                self.restarts += 1
+            finally:
+                self.node_limit = None
+
+    def search(self, mode):
+        """
+        Search for a complete assignment from the current domains.
+        """
+        if mode == "backtrack":
+            return self.backtrack(dict())
+        if mode == "cbj":
+            assignment, _ = self.backjump(dict(), dict(), dict())
+            return assignment
+        self.trail = []
+        try:
+            return self.backtrack_mac(dict())
+        finally:
+            self.trail = None
 
     def enforce_node_consistency(self):
         """
@@ -100,9 +296,9 @@ class CrosswordCreator():
          constraints; in this case, the length of the word.)
         """
         for variable in self.domains:
-            for word in set(self.domains[variable]): # Converting domain to set and iterate
-                if len(word) != variable.length: # Checking word length constraint
-                    self.domains[variable].remove(word) # Removing inconsistent word
+            # Keeping only the words with the variable's length
+            length_mask = self.crossword.length_mask(variable.length)
+            self.restrict(variable, self.domains[variable] & length_mask)
 
     def revise(self, x, y):
         """
@@ -119,16 +315,16 @@ class CrosswordCreator():
             return False
     
         i, j = overlap
-        for word_x in set(self.domains[x]): # Checking each word in x's domain
-            remove = True
-            for word_y in self.domains[y]: # Checking each word in y's domain
-                if word_x[i] == word_y[j]:
-                    remove = False
-                    break
-            if remove: # If no match found remove word_x
-                self.domains[x].remove(word_x)
-                revised = True
-            
+        # Collecting x's words with a letter that some word of y can match
+        supported = 0
+        for letter, words_y in self.crossword.letter_masks.get((y.length, j), {}).items():
+            if self.domains[y] & words_y:
+                supported |= self.crossword.letter_mask(x.length, i, letter)
+
+        if self.domains[x] & ~supported: # If some word of x has no match remove it
+            self.restrict(x, self.domains[x] & supported)
+            revised = True
+
         return revised
 
     def ac3(self, arcs=None):
@@ -140,6 +336,11 @@ class CrosswordCreator():
         Return True if arc consistency is enforced and no domains are empty;
         return False if one or more domains end up empty.
         """
+        # A variable with no words of its length at all has no solution,
+        # even if it has no neighbors to revise it against
+        if arcs is None and not all(self.domains.values()):
+            return False
+
         # If arcs is provided use it, otherwise generate all arcs between variables and their neighbors
         queue = arcs if arcs is not None else [(x, y) for x in self.domains for y in self.crossword.neighbors(x)]
     
@@ -148,8 +349,9 @@ class CrosswordCreator():
             if self.revise(x, y):
                 if not self.domains[x]: # If x's domain is empty return False
                     return False
-                for z in self.crossword.neighbors(x) - {y}: # Adding neighboring arcs
-                    queue.append((z, x))
+                for z in self.crossword.neighbors(x): # Adding neighboring arcs
+                    if z != y:
+                        queue.append((z, x))
     
         return True
 
@@ -186,19 +388,30 @@ class CrosswordCreator():
         The first value in the list, for example, should be the one
         that rules out the fewest values among the neighbors of `var`.
         """
+        # Looking up, for each unassigned neighbor, its domain size and how
+        # many of its words have each letter where it overlaps `var`
+        overlapping = []
+        for neighbor in self.crossword.neighbors(var):
+            if neighbor not in assignment:
+                i, j = self.crossword.overlaps[var, neighbor] # Getting overlap indices
+                size, positions = self.count_letters(neighbor)
+                overlapping.append((i, size, positions[j]))
+
         # Function to return total conflicts
         def count_conflicts(value):
             conflicts = 0
-            # Iterating over neighbors and checking if neighbor is not assigned
-            for neighbor in self.crossword.neighbors(var):
-                if neighbor not in assignment:
-                    i, j = self.crossword.overlaps[var, neighbor] # Getting overlap indices
-                    for word in self.domains[neighbor]: # Iterating over words in neighbor's domain
-                        if value[i] != word[j]:
-                            conflicts += 1
+            # Counting each neighbor's words without value's letter at the overlap
+            for i, size, letters in overlapping:
+                conflicts += size - letters.get(value[i], 0)
             return conflicts
     
-        return sorted(self.domains[var], key=count_conflicts)
+        if self.random is not None:
+            # Shuffling words that rule out as many values as each other
+            return sorted(
+                self.domain_words(var),
+                key=lambda value: (count_conflicts(value), self.random.random())
+            )
+        return sorted(self.domain_words(var), key=count_conflicts)
 
     def select_unassigned_variable(self, assignment):
         """
@@ -214,8 +427,19 @@ class CrosswordCreator():
         # Function to calculate heuristics for a variable
         def get_heuristics(var):
             # Returning a tuple of remaining domain size and negative neighbor count
-            return (len(self.domains[var]), -len(self.crossword.neighbors(var)))
-
+            return (self.domain_size(var), -len(self.crossword.neighbors(var)))
+
+        # Breaking the remaining ties, or ties on domain size, at random
+        if self.tie_break == "random":
+            return min(
+                unassigned_variables,
+                key=lambda var: (self.domain_size(var), self.random.random())
+            )
+        if self.random is not None:
+            return min(
+                unassigned_variables,
+                key=lambda var: (*get_heuristics(var), self.random.random())
+            )
         return min(unassigned_variables, key=get_heuristics)
 
     def backtrack(self, assignment):
@@ -227,41 +451,440 @@ class CrosswordCreator():
 
         If no assignment is possible, return None.
         """
+        # Validating the starting assignment once; after that only each new
+        # word needs checking
+        if not self.consistent(assignment):
+            return None
+        return self.backtrack_incremental(dict(assignment), set(assignment.values()))
+
+    def backtrack_incremental(self, assignment, used):
+        """
+        Extend a consistent `assignment`, whose words are the set `used`,
+        to a complete assignment, checking each word tried only against
+        the assigned neighbors of its variable and against `used`. Both
+        are updated in place and restored on backtracking.
+
+        If no assignment is possible, return None.
+        """
+        self.count_node()
+
         # Checking if assignment is complete
-        if self.assignment_complete(assignment):
-            return assignment
+        if len(assignment) == len(self.crossword.variables):
+            return dict(assignment)
 
         # Selecting unassigned assignment
         var = self.select_unassigned_variable(assignment)
 
         # Iterating over ordered domain values
         for value in self.order_domain_values(var, assignment):
-            new_assignment = assignment.copy()
-            new_assignment[var] = value
 
-            # Checking if assignment is consistent
-            if self.consistent(new_assignment):
-                result = self.backtrack(new_assignment) # Attempting to complete assignment
+            # Checking if the new word is consistent with the assignment
+            if self.consistent_value(var, value, assignment, used):
+                assignment[var] = value
+                used.add(value)
+                result = self.backtrack_incremental(assignment, used) # Attempting to complete assignment
                 if result is not None:
                     return result
-    
+                del assignment[var]
+                used.remove(value)
+
         return None
 
-def main():
+    def consistent_value(self, var, value, assignment, used):
+        """
+        Return True if assigning `value` to the unassigned `var` keeps the
+        consistent `assignment`, whose words are the set `used`, consistent;
+        return False otherwise.
+        """
+        if value in used or len(value) != var.length:
+            return False
+        for neighbor in self.crossword.neighbors(var):
+            if neighbor in assignment:
+                i, j = self.crossword.overlaps[var, neighbor]
+                if value[i] != assignment[neighbor][j]: # Checking for conflicting characters
+                    return False
+        return True
+
+    def backjump(self, assignment, users, depths):
+        """
+        Using Backtracking Search with conflict-directed backjumping, extend
+        the consistent `assignment` to a complete assignment. `users` maps
+        each word in use to its variable and `depths` maps each assigned
+        variable to how many were assigned before it; all three are updated
+        in place and restored on backtracking.
+
+        Each word that clashes with the assignment blames the earliest
+        assigned variable it clashes with. Once every word of a variable
+        has failed, the variables blamed form its conflict set: the search
+        jumps straight back to the most recent of them, skipping the words
+        left to try at every level in between, and remembers their words
+        as a nogood so the same failure is never searched for again.
+
+        Return (assignment, None) with a complete assignment, or (None,
+        conflict set) if there is none below this point.
+        """
+        self.count_node()
+
+        # Checking if assignment is complete
+        if len(assignment) == len(self.crossword.variables):
+            return dict(assignment), None
+
+        # Selecting unassigned variable
+        var = self.select_unassigned_variable(assignment)
+
+        # Failing at once if a remembered nogood holds
+        nogoods = self.nogoods.setdefault(var, OrderedDict())
+        for nogood in nogoods:
+            if all(assignment.get(other) == word for other, word in nogood):
+                nogoods.move_to_end(nogood)
+                self.nogood_hits += 1
+                return None, {other for other, _ in nogood}
+
+        conflicts = set()
+        for value in self.order_domain_values(var, assignment):
+            culprit = self.culprit(var, value, assignment, users, depths)
+            if culprit is not None:
+                conflicts.add(culprit)
+                continue
+
+            assignment[var] = value
+            users[value] = var
+            depths[var] = len(depths)
+            result, below = self.backjump(assignment, users, depths)
+            if result is not None:
+                return result, None
+            del assignment[var]
+            del users[value]
+            del depths[var]
+
+            # A failure that does not involve `var` fails for every word of it
+            if var not in below:
+                self.backjumps += 1
+                return None, below
+            conflicts |= below - {var}
+
+        # Remembering that the words of the conflict set leave `var` no word
+        nogood = frozenset((other, assignment[other]) for other in conflicts)
+        nogoods[nogood] = True
+        if len(nogoods) > NOGOOD_LIMIT:
+            nogoods.popitem(last=False)
+        return None, conflicts
+
+    def culprit(self, var, value, assignment, users, depths):
+        """
+        Return the earliest assigned variable that rules out assigning
+        `value` to `var`, or None if `value` is consistent with `assignment`.
+        """
+        culprits = []
+        if value in users: # Checking for duplicate words
+            culprits.append(users[value])
+        for neighbor in self.crossword.neighbors(var):
+            if neighbor in assignment:
+                i, j = self.crossword.overlaps[var, neighbor]
+                if value[i] != assignment[neighbor][j]: # Checking for conflicting characters
+                    culprits.append(neighbor)
+        if not culprits:
+            return None
+        return min(culprits, key=depths.get)
+
+    def backtrack_mac(self, assignment):
+        """
+        Using Backtracking Search that maintains arc consistency, take as
+        input a partial assignment for the crossword and return a complete
+        assignment if possible to do so. See `mac_solutions`.
+
+        If no assignment is possible, return None.
+        """
+        for solution in self.mac_solutions(assignment):
+            return dict(solution)
+        return None
+
+    def mac_solutions(self, assignment):
+        """
+        Yield every complete assignment that extends `assignment`, using
+        Backtracking Search that maintains arc consistency.
+
+        Assigning a word narrows the variable's domain to that word, takes
+        the word out of every other domain and then runs `ac3` on the arcs
+        into the changed variables, so dead ends show up as an empty domain
+        as soon as they are forced. Everything narrowed is undone from the
+        trail before trying the next word. `assignment` is updated in place,
+        and each complete assignment yielded is that same dictionary, only
+        valid until the search resumes.
+        """
+        self.count_node()
+
+        # Checking if assignment is complete
+        if len(assignment) == len(self.crossword.variables):
+            yield assignment
+            return
 
-    # Check usage
-    if len(sys.argv) not in [3, 4]:
-        sys.exit("Usage: python generate.py structure words [output]")
+        # Selecting unassigned variable
+        var = self.select_unassigned_variable(assignment)
+
+        # Iterating over ordered domain values
+        for value in self.order_domain_values(var, assignment):
+            mark = len(self.trail)
+            assignment[var] = value
+            if self.propagate(var, value):
+                yield from self.mac_solutions(assignment)
+
+            # Undoing the assignment and everything it narrowed
+            del assignment[var]
+            self.undo(mark)
+
+    def solutions(self):
+        """
+        Yield every complete assignment for the crossword, one at a time,
+        propagating as `solve(mode="mac")` does.
+        """
+        for assignment in self.each_solution():
+            yield dict(assignment)
+
+    def count_solutions(self, limit=None):
+        """
+        Return how many complete assignments there are for the crossword,
+        counting no further than `limit` if it is given, without keeping
+        any of them.
+        """
+        count = 0
+        if limit is not None and limit <= 0:
+            return count
+        for _ in self.each_solution():
+            count += 1
+            if count == limit:
+                break
+        return count
+
+    def each_solution(self):
+        """
+        Enforce node and arc consistency, then yield every complete
+        assignment as `mac_solutions` does, restoring the domains to
+        how they were before the search once done.
+        """
+        self.enforce_node_consistency()
+        if not self.ac3():
+            return
+        self.trail = []
+        try:
+            yield from self.mac_solutions(dict())
+        finally:
+            self.undo(0)
+            self.trail = None
+
+    def propagate(self, var, value):
+        """
+        Narrow the domains after assigning `value` to `var`.
+
+        Return False if some domain ends up empty; return True otherwise.
+        """
+        bit = self.crossword.word_mask(value)
+        self.restrict(var, bit)
+
+        # Each word may be used only once
+        changed = [var]
+        for other in self.crossword.variables:
+            if other != var and other.length == var.length and self.domains[other] & bit:
+                self.restrict(other, self.domains[other] & ~bit)
+                if not self.domains[other]:
+                    return False
+                changed.append(other)
+
+        # Making every neighbor of a changed variable arc consistent with it
+        arcs = [
+            (neighbor, variable)
+            for variable in changed
+            for neighbor in self.crossword.neighbors(variable)
+        ]
+        return self.ac3(arcs)
+
+def luby(i):
+    """
+    Return the `i`th term, counting from 1, of the Luby sequence
+    1, 1, 2, 1, 1, 2, 4, 1, 1, 2, 1, 1, 2, 4, 8, ...
+    """
+    k = 1
+    while (1 << k) - 1 < i:
+        k += 1
+    if i == (1 << k) - 1:
+        return 1 << (k - 1)
+    return luby(i - (1 << (k - 1)) + 1)
+
+
+def portfolio_configurations(size, seed=0):
+    """
+    Return `size` solver configurations for `solve_portfolio`, each a dict
+    of mode, tie_break, seed and restart_base. The first is the plain
+    deterministic solver, so a portfolio never does worse than it by more
+    than the cost of starting processes.
+    """
+    configurations = [
+        {"mode": "mac", "tie_break": "degree", "seed": None, "restart_base": None}
+    ]
+    variations = [
+        ("mac", "degree", None),
+        ("mac", "random", 100),
+        ("mac", "degree", 100),
+        ("backtrack", "random", 1000),
+        ("cbj", "degree", None),
+        ("mac", "random", None),
+        ("mac", "degree", 1000),
+    ]
+    for index in range(1, size):
+        mode, tie_break, restart_base = variations[(index - 1) % len(variations)]
+        configurations.append({
+            "mode": mode,
+            "tie_break": tie_break,
+            "seed": seed + index,
+            "restart_base": restart_base
+        })
+    return configurations[:size]
+
+
+def solve_portfolio(crossword, configurations):
+    """
+    Solve `crossword` with each of `configurations` at once, one process
+    each, stopping all of them as soon as one finishes. Every search is
+    complete, so the first to finish without a solution proves there is
+    none.
+
+    Return (assignment, winner, nodes): the solution, or None if there is
+    none, the index of the configuration that finished first, and how
+    many search nodes each configuration had visited. Raise RuntimeError
+    if every configuration fails or the workers exit without finishing.
+    """
+    if not configurations:
+        raise ValueError("a portfolio needs at least one configuration")
+    context = multiprocessing.get_context()
+    results = context.Queue()
+    nodes = context.Array("q", len(configurations), lock=False)
+    processes = [
+        context.Process(
+            target=portfolio_worker,
+            args=(crossword, index, configuration, nodes, results),
+            daemon=True
+        )
+        for index, configuration in enumerate(configurations)
+    ]
+    for process in processes:
+        process.start()
+
+    try:
+        errors = dict()
+        while True:
+            try:
+                winner, assignment, error = results.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                if any(process.exitcode is None for process in processes):
+                    continue
+
+                # Every worker has exited, so anything they sent is waiting
+                try:
+                    winner, assignment, error = results.get(timeout=POLL_INTERVAL)
+                except queue.Empty:
+                    codes = [process.exitcode for process in processes]
+                    raise RuntimeError(
+                        f"portfolio workers exited without a result: {codes}"
+                    ) from None
+            if error is None:
+                break
+
+            # A failed configuration proves nothing, so wait for the others
+            errors[winner] = error
+            if len(errors) == len(configurations):
+                raise RuntimeError(
+                    f"every portfolio worker failed; worker 0:\n{errors[0]}"
+                )
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
+    return assignment, winner, list(nodes)
+
+
+def portfolio_worker(crossword, index, configuration, nodes, results):
+    """
+    Solve `crossword` with one portfolio configuration, keeping its node
+    count in `nodes[index]` and putting (index, assignment, error) on
+    `results`, where error is None or the traceback the search failed with.
+    """
+    try:
+        creator = CrosswordCreator(crossword)
+        creator.tie_break = configuration["tie_break"]
+        if configuration["seed"] is not None:
+            creator.random = random.Random(configuration["seed"])
+
+        def progress(count):
+            nodes[index] = count
+
+        creator.progress = progress
+        assignment = creator.solve(configuration["mode"], configuration["restart_base"])
+        nodes[index] = creator.nodes
+    except Exception:
+        results.put((index, None, traceback.format_exc()))
+        return
+    results.put((index, assignment, None))
+
+
+def main():
 
     # Parse command-line arguments
-    structure = sys.argv[1]
-    words = sys.argv[2]
-    output = sys.argv[3] if len(sys.argv) == 4 else None
+    parser = argparse.ArgumentParser(
+        usage="python generate.py [--mode MODE] structure words [output]"
+    )
+    parser.add_argument("structure")
+    parser.add_argument("words")
+    parser.add_argument("output", nargs="?")
+    parser.add_argument(
+        "--mode", choices=["backtrack", "mac", "cbj"], default="backtrack",
+        help="search plainly, maintain arc consistency while searching, or "
+             "jump back to the cause of each dead end"
+    )
+    parser.add_argument(
+        "--portfolio", type=int, metavar="N",
+        help="race N differently configured solvers in separate processes"
+    )
+    parser.add_argument(
+        "--seed", type=int, default=0,
+        help="seed for the randomised portfolio solvers"
+    )
+    parser.add_argument(
+        "--stats", action="store_true",
+        help="report search nodes, restarts, backjumps and nogoods reused"
+    )
+    parser.add_argument(
+        "--count", type=int, metavar="LIMIT",
+        help="count the ways to fill the structure, stopping at LIMIT"
+    )
+    args = parser.parse_args()
+    if args.portfolio is not None and args.portfolio < 1:
+        parser.error("--portfolio needs at least one solver")
+    structure = args.structure
+    words = args.words
+    output = args.output
 
     # Generate crossword
     crossword = Crossword(structure, words)
     creator = CrosswordCreator(crossword)
-    assignment = creator.solve()
+    if args.count is not None:
+        count = creator.count_solutions(args.count)
+        print(f"{count}{'+' if count == args.count else ''} solutions.")
+        return
+    if args.portfolio is not None:
+        configurations = portfolio_configurations(args.portfolio, args.seed)
+        try:
+            assignment, winner, nodes = solve_portfolio(crossword, configurations)
+        except RuntimeError as error:
+            sys.exit(str(error))
+        for index, configuration in enumerate(configurations):
+            marker = "*" if index == winner else " "
+            print(f"{marker} worker {index}: {nodes[index]} nodes, {configuration}")
+    else:
+        assignment = creator.solve(args.mode)
+        if args.stats:
+            print(f"{creator.nodes} nodes, {creator.restarts} restarts, "
+                  f"{creator.backjumps} backjumps, {creator.nogood_hits} nogoods reused")
 
     # Print result
     if assignment is None:
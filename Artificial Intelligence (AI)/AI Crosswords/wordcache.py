@@ -0,0 +1,400 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+from bisect import bisect_left
+from collections.abc import Mapping, Sequence, Set
+
+# Suffix of the compiled cache written next to a word list
+CACHE_SUFFIX = ".wordcache"
+
+# Bumped whenever the layout of a cache changes
+VERSION = 1
+
+MAGIC = b"WORDSET\0"
+HEADER = struct.Struct("<8sII")
+
+
+class Vocabulary():
+    """
+    Word list grouped by length, with a bitset index over each group, read
+    straight out of a compiled cache (or the same bytes built in memory).
+
+    The words of each length are stored sorted, one fixed-width record
+    each, so that the word with index k sits at a known offset. For each
+    length and position, the cache stores the letters found there and,
+    for each letter, the bitset of the words with it there. Nothing is
+    decoded until a length is first used.
+    """
+
+    def __init__(self, data, manifest, base, path=None):
+        self.data = data
+        self.path = path
+        self.encoding = manifest["encoding"]
+        self.width = 1 if self.encoding == "ascii" else 4
+        self.groups = {
+            int(length): group for length, group in manifest["lengths"].items()
+        }
+        self.base = base
+
+        self.words = WordSet(self)
+        self.words_by_length = WordLists(self)
+        self.length_masks = LengthMasks(self)
+        self.letter_masks = LetterMasks(self)
+
+    def index(self, word):
+        """
+        Return the index of `word` among the words of its length, or None
+        if it is not in the list.
+        """
+        words = self.words_by_length.get(len(word))
+        if words is None:
+            return None
+        index = bisect_left(words, word)
+        if index < len(words) and words[index] == word:
+            return index
+        return None
+
+    def __reduce__(self):
+        # Processes started by spawning get the cache mapped afresh
+        if self.path is not None:
+            return remap, (self.path,)
+        manifest, base = read_manifest(self.data)
+        return Vocabulary, (self.data, manifest, base)
+
+
+class WordList(Sequence):
+    """Sorted words of one length, decoded from the cache on demand."""
+
+    def __init__(self, vocabulary, length):
+        self.vocabulary = vocabulary
+        self.size = vocabulary.width * length
+        self.start = vocabulary.base + vocabulary.groups[length]["words"]
+        self.count = vocabulary.groups[length]["count"]
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("word list index out of range")
+        start = self.start + index * self.size
+        return str(self.vocabulary.data[start:start + self.size], self.vocabulary.encoding)
+
+    def __len__(self):
+        return self.count
+
+
+class WordLists(Mapping):
+    """Mapping from each word length to its WordList."""
+
+    def __init__(self, vocabulary):
+        self.vocabulary = vocabulary
+        self.lists = dict()
+
+    def __getitem__(self, length):
+        if length not in self.vocabulary.groups:
+            raise KeyError(length)
+        if length not in self.lists:
+            self.lists[length] = WordList(self.vocabulary, length)
+        return self.lists[length]
+
+    def __iter__(self):
+        return iter(self.vocabulary.groups)
+
+    def __len__(self):
+        return len(self.vocabulary.groups)
+
+
+class WordSet(Set):
+    """Read-only set of every word in a Vocabulary."""
+
+    def __init__(self, vocabulary):
+        self.vocabulary = vocabulary
+
+    def __contains__(self, word):
+        return isinstance(word, str) and self.vocabulary.index(word) is not None
+
+    def __iter__(self):
+        for words in self.vocabulary.words_by_length.values():
+            yield from words
+
+    def __len__(self):
+        return sum(group["count"] for group in self.vocabulary.groups.values())
+
+
+class LengthMasks(Mapping):
+    """Mapping from each word length to the bitset of all its words."""
+
+    def __init__(self, vocabulary):
+        self.vocabulary = vocabulary
+
+    def __getitem__(self, length):
+        if length not in self.vocabulary.groups:
+            raise KeyError(length)
+        return (1 << self.vocabulary.groups[length]["count"]) - 1
+
+    def __iter__(self):
+        return iter(self.vocabulary.groups)
+
+    def __len__(self):
+        return len(self.vocabulary.groups)
+
+
+class LetterMasks(Mapping):
+    """
+    Mapping from each (length, position) to a dict from every letter found
+    there to the bitset of the words of that length with it there.
+    """
+
+    def __init__(self, vocabulary):
+        self.vocabulary = vocabulary
+        self.masks = dict()
+
+    def __getitem__(self, key):
+        if key in self.masks:
+            return self.masks[key]
+        length, position = key
+        group = self.vocabulary.groups.get(length)
+        if group is None or not 0 <= position < length:
+            raise KeyError(key)
+
+        # Each letter's bitset follows the one before in a single block
+        letters, offset = group["positions"][position]
+        size = mask_size(group["count"])
+        start = self.vocabulary.base + offset
+        data = self.vocabulary.data
+        masks = dict()
+        for k, letter in enumerate(letters):
+            chunk = data[start + k * size:start + (k + 1) * size]
+            masks[letter] = int.from_bytes(chunk, "little")
+        self.masks[key] = masks
+        return masks
+
+    def __iter__(self):
+        for length in self.vocabulary.groups:
+            for position in range(length):
+                yield length, position
+
+    def __len__(self):
+        return sum(self.vocabulary.groups)
+
+
+def load(words_file):
+    """
+    Return the Vocabulary of `words_file`, memory-mapping its compiled
+    cache. The cache is (re)written first if it is missing or was
+    compiled from a different version of the file; if it cannot be
+    written, the vocabulary is compiled in memory instead.
+    """
+    path = words_file + CACHE_SUFFIX
+    vocabulary = read(path, words_file)
+    if vocabulary is not None:
+        return vocabulary
+
+    data = compile_words(words_file)
+    try:
+        write(path, data)
+    except OSError:
+        # A read-only word list directory just means no cache
+        pass
+    manifest, base = read_manifest(data)
+    return Vocabulary(data, manifest, base)
+
+
+def read(path, words_file):
+    """
+    Return the Vocabulary in the cache at `path`, or None if there is no
+    cache there or it is out of date with `words_file`.
+    """
+    try:
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    manifest, base = read_manifest(mapped)
+    status = None if manifest is None else compare(manifest["source"], words_file)
+    if status is None:
+        mapped.close()
+        return None
+
+    # Recording a touched file's new time, so it is not hashed again
+    if status != manifest["source"]:
+        manifest["source"] = status
+        data = pack(manifest, mapped[base:])
+        mapped.close()
+        try:
+            write(path, data)
+        except OSError:
+            manifest, base = read_manifest(data)
+            return Vocabulary(data, manifest, base)
+        return remap(path)
+    return Vocabulary(mapped, manifest, base, path)
+
+
+def write(path, data):
+    """
+    Write the bytes of a compiled cache to `path`, through a temporary
+    file so that readers never see half a cache.
+    """
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(data)
+    os.replace(temporary, path)
+
+
+def remap(path):
+    """
+    Return the Vocabulary in the cache at `path`, whether or not it is
+    still current.
+    """
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    manifest, base = read_manifest(mapped)
+    return Vocabulary(mapped, manifest, base, path)
+
+
+def compile_words(words_file):
+    """
+    Return the bytes of a compiled cache of the word list in `words_file`.
+    """
+    with open(words_file) as f:
+        words = set(f.read().upper().splitlines())
+    words.discard("")
+    source = fingerprint(words_file)
+
+    groups = dict()
+    for word in sorted(words):
+        groups.setdefault(len(word), []).append(word)
+    encoding = "ascii" if all(word.isascii() for word in words) else "utf-32-le"
+
+    # Laying out each length's words, then its bitsets position by position
+    sections = []
+    position = 0
+    lengths = dict()
+    for length, group in groups.items():
+        encoded = "".join(group).encode(encoding)
+        lengths[length] = {"count": len(group), "words": position, "positions": []}
+        sections.append(encoded)
+        position += padded(len(encoded))
+
+        size = mask_size(len(group))
+        for k in range(length):
+            indices = dict()
+            for index, word in enumerate(group):
+                indices.setdefault(word[k], []).append(index)
+            letters = "".join(sorted(indices))
+            block = b"".join(
+                bitset(indices[letter], size) for letter in letters
+            )
+            lengths[length]["positions"].append([letters, position])
+            sections.append(block)
+            position += padded(len(block))
+
+    manifest = {
+        "source": source,
+        "encoding": encoding,
+        "lengths": lengths
+    }
+    body = []
+    for section in sections:
+        body.append(section)
+        body.append(bytes(padded(len(section)) - len(section)))
+    return pack(manifest, b"".join(body))
+
+
+def pack(manifest, body):
+    """
+    Return the bytes of a compiled cache with `manifest`, followed by the
+    `body` holding its sections.
+    """
+    encoded = json.dumps(manifest).encode("utf-8")
+    end = HEADER.size + len(encoded)
+    return b"".join([
+        HEADER.pack(MAGIC, VERSION, len(encoded)), encoded,
+        bytes(padded(end) - end), body
+    ])
+
+
+def read_manifest(data):
+    """
+    Returns the manifest of a compiled cache and the position its sections
+    start at, or (None, None) if it is not a cache of this version.
+    """
+    if len(data) < HEADER.size:
+        return None, None
+    magic, version, length = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        return None, None
+    end = HEADER.size + length
+    try:
+        manifest = json.loads(bytes(data[HEADER.size:end]).decode("utf-8"))
+    except ValueError:
+        return None, None
+    return manifest, padded(end)
+
+
+def compare(recorded, words_file):
+    """
+    Compares `words_file` with the `recorded` fingerprint of the file a
+    cache was compiled from.
+
+    Returns `recorded` itself if the file is unchanged, a new fingerprint
+    if it has only been touched, or None if it has changed or is missing.
+    """
+    try:
+        stat = os.stat(words_file)
+    except OSError:
+        return None
+    if stat.st_size != recorded["size"]:
+        return None
+    if stat.st_mtime_ns == recorded["mtime_ns"]:
+        return recorded
+
+    # A file that was touched but not changed still matches its hash
+    if file_hash(words_file) != recorded["sha256"]:
+        return None
+    return dict(recorded, mtime_ns=stat.st_mtime_ns)
+
+
+def fingerprint(path):
+    """
+    Returns the modification time, size and hash of the file at `path`.
+    """
+    stat = os.stat(path)
+    return {
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "sha256": file_hash(path)
+    }
+
+
+def file_hash(path):
+    """
+    Returns the SHA-256 hex digest of the file at `path`.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def bitset(indices, size):
+    """
+    Return `size` little-endian bytes with the bits at `indices` set.
+    """
+    data = bytearray(size)
+    for index in indices:
+        data[index >> 3] |= 1 << (index & 7)
+    return bytes(data)
+
+
+def mask_size(count):
+    """Returns the number of bytes a bitset over `count` words takes."""
+    return (count + 7) // 8
+
+
+def padded(size):
+    """Rounds `size` up to the next multiple of 8."""
+    return (size + 7) & ~7
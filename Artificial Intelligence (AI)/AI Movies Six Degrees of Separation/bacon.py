@@ -0,0 +1,210 @@
+import argparse
+import csv
+import sys
+
+import numpy as np
+
+import degrees
+
+# Distance stored for people the source cannot reach
+UNREACHABLE = 255
+
+
+class BaconNumbers():
+    """
+    Distances from one source person to everyone, with the movie and
+    person each reachable person was first reached through.
+    """
+
+    def __init__(self, source, distance, via_movie, via_person):
+        self.source = source
+        self.distance = distance
+        self.via_movie = via_movie
+        self.via_person = via_person
+
+    def degrees(self, person):
+        """
+        Returns the degrees of separation between the source and a person
+        index, or None if they are not connected.
+        """
+        distance = int(self.distance[person])
+        return None if distance == UNREACHABLE else distance
+
+    def path(self, person):
+        """
+        Returns the list of (movie, person) index pairs that leads from the
+        source to a person index, or None if they are not connected.
+        """
+        if self.distance[person] == UNREACHABLE:
+            return None
+        path = []
+        while person != self.source:
+            path.append((int(self.via_movie[person]), person))
+            person = int(self.via_person[person])
+        path.reverse()
+        return path
+
+    def save(self, path):
+        """
+        Write the distances to `path`, as CSV if it ends in ".csv" and as
+        a NumPy archive otherwise.
+        """
+        if path.endswith(".csv"):
+            self.save_csv(path)
+        else:
+            np.savez(
+                path, source=self.source, distance=self.distance,
+                via_movie=self.via_movie, via_person=self.via_person
+            )
+
+    def save_csv(self, path):
+        """
+        Write one row per reachable person to the CSV file at `path`.
+        """
+        graph = degrees.graph
+        reachable = np.flatnonzero(self.distance != UNREACHABLE)
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["person_id", "distance", "movie_id", "via_person_id"])
+            for person in reachable.tolist():
+                if person == self.source:
+                    writer.writerow([graph.person_ids[person], 0, "", ""])
+                    continue
+                writer.writerow([
+                    graph.person_ids[person],
+                    int(self.distance[person]),
+                    graph.movie_ids[int(self.via_movie[person])],
+                    graph.person_ids[int(self.via_person[person])]
+                ])
+
+
+def compute(graph, source):
+    """
+    Returns the BaconNumbers of every person in `graph` from the source
+    person index.
+
+    The search is level-synchronous: each round gathers the movies of the
+    whole frontier, keeps those not used before, then gathers their casts
+    and keeps the people not reached before, all as NumPy array operations.
+    """
+    # Vectorising needs every credit in the arrays, not in the overlays
+    graph.compact()
+
+    person_offsets = np.frombuffer(graph.person_offsets, dtype=np.int64)
+    person_movies = np.frombuffer(graph.person_movies, dtype=np.int32)
+    movie_offsets = np.frombuffer(graph.movie_offsets, dtype=np.int64)
+    movie_stars = np.frombuffer(graph.movie_stars, dtype=np.int32)
+
+    people = len(person_offsets) - 1
+    distance = np.full(people, UNREACHABLE, dtype=np.uint8)
+    via_movie = np.full(people, -1, dtype=np.int32)
+    via_person = np.full(people, -1, dtype=np.int32)
+    movie_used = np.zeros(len(movie_offsets) - 1, dtype=bool)
+
+    distance[source] = 0
+    frontier = np.array([source], dtype=np.int32)
+    depth = 0
+    while frontier.size and depth + 1 < UNREACHABLE:
+        depth += 1
+
+        # Movies of the frontier that no earlier level went through
+        movies, owner = gather(person_offsets, person_movies, frontier)
+        fresh = ~movie_used[movies]
+        movies, first = np.unique(movies[fresh], return_index=True)
+        owners = frontier[owner[fresh][first]]
+        movie_used[movies] = True
+
+        # Their stars who have not been reached yet
+        stars, owner = gather(movie_offsets, movie_stars, movies)
+        fresh = distance[stars] == UNREACHABLE
+        stars, first = np.unique(stars[fresh], return_index=True)
+        owner = owner[fresh][first]
+
+        distance[stars] = depth
+        via_movie[stars] = movies[owner]
+        via_person[stars] = owners[owner]
+        frontier = stars.astype(np.int32)
+
+    return BaconNumbers(source, distance, via_movie, via_person)
+
+
+def gather(offsets, values, rows):
+    """
+    Returns the concatenated compressed sparse rows `rows`, along with the
+    position in `rows` that each returned value came from.
+    """
+    starts = offsets[rows]
+    counts = offsets[rows + 1] - starts
+    owner = np.repeat(np.arange(len(rows)), counts)
+    ends = np.cumsum(counts)
+    total = int(ends[-1]) if len(ends) else 0
+
+    # Each value's slot is its row's start plus its rank within the row
+    positions = np.repeat(starts - (ends - counts), counts) + np.arange(total)
+    return values[positions], owner
+
+
+def load(path):
+    """
+    Returns the BaconNumbers saved as a NumPy archive at `path`.
+    """
+    with np.load(path) as archive:
+        return BaconNumbers(
+            int(archive["source"]), archive["distance"],
+            archive["via_movie"], archive["via_person"]
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compute everyone's degrees of separation from one "
+                    "person, or look them up afterwards."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    compute_parser = commands.add_parser("compute")
+    compute_parser.add_argument("directory")
+    compute_parser.add_argument("name", help="name or IMDB id of the source")
+    compute_parser.add_argument(
+        "output", help="file to write: .csv for CSV, anything else for .npz"
+    )
+
+    lookup_parser = commands.add_parser("lookup")
+    lookup_parser.add_argument("directory")
+    lookup_parser.add_argument("numbers", help=".npz file written by compute")
+    lookup_parser.add_argument("name", help="name or IMDB id to look up")
+
+    args = parser.parse_args()
+    degrees.load_data(args.directory)
+    graph = degrees.graph
+
+    try:
+        person = graph.person_index(degrees.resolve_person(args.name))
+    except LookupError as error:
+        sys.exit(str(error))
+
+    if args.command == "compute":
+        numbers = compute(graph, person)
+        numbers.save(args.output)
+        reached = numbers.distance[numbers.distance != UNREACHABLE]
+        print(f"Reached {len(reached)} people, at most {int(reached.max())} degrees away.")
+        return
+
+    numbers = load(args.numbers)
+    if len(numbers.distance) != len(graph.person_ids):
+        sys.exit("Those numbers were computed for different data.")
+    path = numbers.path(person)
+    source = graph.person_names[numbers.source]
+    if path is None:
+        print(f"Not connected to {source}.")
+        return
+    print(f"{len(path)} degrees of separation from {source}.")
+    previous = numbers.source
+    for i, (movie, star) in enumerate(path, start=1):
+        print(f"{i}: {graph.person_names[previous]} and "
+              f"{graph.person_names[star]} starred in {graph.movie_titles[movie]}")
+        previous = star
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+
+import degrees
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Answer many degrees of separation queries at once, "
+                    "writing one JSON result per line."
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument(
+        "pairs", nargs="?", default="-",
+        help="file of tab-separated source and target names or IMDB ids, "
+             "or - for stdin"
+    )
+    parser.add_argument(
+        "--target",
+        help="find the path from every person listed in the input "
+             "(one per line) to this person"
+    )
+    parser.add_argument("--output", default="-", help="file to write, or - for stdout")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument(
+        "--method", choices=["bfs", "bidirectional", "astar"],
+        help="search method; defaults to astar with --landmarks, else bfs"
+    )
+    parser.add_argument(
+        "--landmarks", action="store_true",
+        help="load (or build) the landmark index to guide searches"
+    )
+    args = parser.parse_args()
+
+    pairs_file = sys.stdin if args.pairs == "-" else open(args.pairs, encoding="utf-8")
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+
+    # Loading once up front, so forked workers share the parent's pages
+    load_worker(args.directory, args.landmarks)
+
+    queries = (
+        (source, target, args.method)
+        for source, target in read_pairs(pairs_file, args.target)
+    )
+    worker_args = (args.directory, args.landmarks)
+    for result in run_queries(queries, args.workers, worker_args):
+        output.write(json.dumps(result) + "\n")
+        output.flush()
+
+
+def read_pairs(lines, target=None):
+    """
+    Yields (source, target) pairs from tab-separated lines, skipping blank
+    lines. If `target` is given, each line holds just the source.
+    """
+    for line in lines:
+        line = line.rstrip("\n")
+        if not line.strip():
+            continue
+        if target is not None:
+            yield line.strip(), target
+        else:
+            source, _, other = line.partition("\t")
+            yield source.strip(), other.strip()
+
+
+def load_worker(directory, use_landmarks=False):
+    """
+    Load the data a process needs to answer queries.
+    """
+    degrees.load_data(directory)
+    if use_landmarks:
+        degrees.load_landmarks(directory)
+
+
+def run_queries(queries, workers, worker_args):
+    """
+    Yields the result of each (source, target, method) query, in order,
+    answering them across `workers` processes. Without fork, each worker
+    first calls load_worker with `worker_args`.
+    """
+    if workers <= 1:
+        yield from map(answer, queries)
+        return
+
+    # Forked workers inherit the loaded graph copy-on-write. Elsewhere each
+    # worker loads it again, which maps the same snapshot pages
+    if "fork" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("fork")
+        initializer, initargs = None, ()
+    else:
+        context = multiprocessing.get_context("spawn")
+        initializer, initargs = load_worker, worker_args
+
+    with context.Pool(workers, initializer, initargs) as pool:
+        yield from pool.imap(answer, queries, chunksize=64)
+
+
+def answer(query):
+    """
+    Returns a JSON-ready result for one (source, target, method) query.
+    """
+    source_name, target_name, method = query
+    result = {"source": source_name, "target": target_name}
+
+    try:
+        source = degrees.resolve_person(source_name)
+        target = degrees.resolve_person(target_name)
+    except LookupError as error:
+        result["error"] = str(error)
+        return result
+
+    path = degrees.shortest_path(source, target, method=method)
+    if path is None:
+        result["degrees"] = None
+        result["path"] = None
+    else:
+        result["degrees"] = len(path)
+        result["path"] = [list(step) for step in path]
+    return result
+
+
+if __name__ == "__main__":
+    main()
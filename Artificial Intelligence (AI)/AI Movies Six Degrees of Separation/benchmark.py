@@ -0,0 +1,91 @@
+import argparse
+import random
+import statistics
+import time
+from collections import Counter
+
+import degrees
+from graph import peak_rss
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Report load time, memory and shortest_path latency "
+                    "over a data directory, such as one from generate_data.py."
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--method", choices=["bfs", "bidirectional", "astar"],
+        help="search method; defaults to astar with --landmarks, else bfs"
+    )
+    parser.add_argument(
+        "--landmarks", action="store_true",
+        help="load (or build) the landmark index to guide searches"
+    )
+    args = parser.parse_args()
+
+    # Parsing the CSV files, then writing the snapshot untimed
+    start = time.perf_counter()
+    report = degrees.load_data(args.directory, cache=False)
+    print(f"CSV load: {time.perf_counter() - start:.3f}s")
+    for line in report.lines():
+        print(f"  {line}")
+    degrees.snapshot.save(degrees.graph, args.directory)
+
+    # Then mapping the snapshot, as every later run would
+    start = time.perf_counter()
+    degrees.load_data(args.directory)
+    print(f"Snapshot load: {time.perf_counter() - start:.3f}s")
+
+    if args.landmarks:
+        start = time.perf_counter()
+        degrees.load_landmarks(args.directory)
+        print(f"Landmarks: {time.perf_counter() - start:.3f}s")
+
+    graph = degrees.graph
+    print(f"{len(graph.person_ids)} people, {len(graph.movie_ids)} movies, "
+          f"{graph.star_count()} stars")
+
+    # Seeded apart from generate_data.py's stream, which with the same seed
+    # would pick people in the order it ranked their popularity
+    random_pairs = random.Random(f"queries-{args.seed}")
+    person_count = len(graph.person_ids)
+    latencies = []
+    lengths = Counter()
+    for _ in range(args.queries):
+        source = graph.person_ids[random_pairs.randrange(person_count)]
+        target = graph.person_ids[random_pairs.randrange(person_count)]
+        start = time.perf_counter()
+        path = degrees.shortest_path(source, target, method=args.method)
+        latencies.append(time.perf_counter() - start)
+        lengths[None if path is None else len(path)] += 1
+
+    report_latencies(latencies)
+    connected = sorted(length for length in lengths if length is not None)
+    print("Degrees: " + ", ".join(f"{length}: {lengths[length]}" for length in connected)
+          + f", not connected: {lengths[None]}")
+
+    peak = peak_rss()
+    if peak is not None:
+        print(f"Peak memory: {peak / 2 ** 20:.1f} MiB")
+
+
+def report_latencies(latencies):
+    """
+    Print throughput and latency percentiles for a list of query durations.
+    """
+    latencies = sorted(latencies)
+    total = sum(latencies)
+    print(f"{len(latencies)} queries in {total:.3f}s "
+          f"({len(latencies) / total:.0f} queries/s)")
+    if len(latencies) > 1:
+        cuts = statistics.quantiles(latencies, n=100)
+        for percentile in (50, 90, 99):
+            print(f"p{percentile}: {cuts[percentile - 1] * 1000:.3f}ms")
+    print(f"max: {latencies[-1] * 1000:.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
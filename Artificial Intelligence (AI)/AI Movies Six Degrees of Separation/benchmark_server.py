@@ -0,0 +1,67 @@
+import argparse
+import random
+import statistics
+import time
+
+import degrees
+import server
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Drive the degrees service in-process and report latency."
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--requests", type=int, default=10_000)
+    parser.add_argument(
+        "--pairs", type=int, default=500,
+        help="number of distinct person pairs to draw requests from"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    server.load(args.directory)
+    print(f"Loaded in {time.perf_counter() - start:.3f}s")
+
+    # Seeded apart from generate_data.py's stream, which with the same seed
+    # would pick people in the order it ranked their popularity
+    random_pairs = random.Random(f"queries-{args.seed}")
+    person_ids = list(degrees.people)
+    pairs = [
+        (random_pairs.choice(person_ids), random_pairs.choice(person_ids))
+        for _ in range(args.pairs)
+    ]
+
+    client = server.app.test_client()
+    latencies = []
+    for _ in range(args.requests):
+        source, target = random_pairs.choice(pairs)
+        # Asking for either direction of a pair should hit the same entry
+        if random_pairs.random() < 0.5:
+            source, target = target, source
+        start = time.perf_counter()
+        response = client.get("/path", query_string={"source": source, "target": target})
+        latencies.append(time.perf_counter() - start)
+        if response.status_code != 200:
+            raise RuntimeError(response.get_json())
+
+    report(latencies)
+    print(client.get("/metrics").get_json())
+
+
+def report(latencies):
+    """
+    Print throughput and latency percentiles for a list of durations.
+    """
+    latencies = sorted(latencies)
+    cuts = statistics.quantiles(latencies, n=100)
+    print(f"{len(latencies)} requests in {sum(latencies):.3f}s "
+          f"({len(latencies) / sum(latencies):.0f} requests/s)")
+    for percentile in (50, 90, 99):
+        print(f"p{percentile}: {cuts[percentile - 1] * 1000:.3f}ms")
+    print(f"max: {latencies[-1] * 1000:.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,67 +1,185 @@
-import csv
+import argparse
+import heapq
+import json
+import math
+import os
 import sys
 
-from util import Node, StackFrontier, QueueFrontier
+import landmarks
+import snapshot
+from graph import Graph, MoviesView, NamesView, PeopleView, movie_mask
+from nameindex import NameIndex
+from util import Node, DequeQueueFrontier, SearchStats
+
+# People and movies with dense integer indices and array-backed adjacency
+graph = Graph()
 
 # Maps names to a set of corresponding person_ids
-names = {}
+names = NamesView(graph)
 
 # Maps person_ids to a dictionary of: name, birth, movies (a set of movie_ids)
-people = {}
+people = PeopleView(graph)
 
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
-movies = {}
+movies = MoviesView(graph)
+
+# Exact, prefix and fuzzy name lookups over the loaded people
+name_index = NameIndex(graph)
+
+# Optional landmark distances used to bound and guide searches
+landmark_index = None
 
 
-def load_data(directory):
+def load_data(directory, cache=True):
     """
     Load data from CSV files into memory.
+
+    Unless `cache` is False, the parsed data is also written to a binary
+    snapshot next to the CSV files, and later loads memory-map that
+    snapshot instead of parsing the CSV files again until they change.
+
+    Returns the LoadReport of parsing the CSV files, or None if they were
+    not parsed.
+    """
+    if cache and snapshot.load(graph, directory):
+        return None
+
+    report = graph.load_csv(directory)
+    if cache:
+        try:
+            snapshot.save(graph, directory)
+        except OSError:
+            # A read-only data directory just means no snapshot
+            pass
+    return report
+
+
+def refresh_data(directory):
+    """
+    Bring the loaded data up to date with the CSV files in `directory`.
+
+    Rows appended to the files since they were loaded are added in place,
+    in time proportional to their number, and recorded in the snapshot's
+    journal; any other change to the files reloads everything.
+    """
+    if not snapshot.refresh(graph, directory):
+        load_data(directory)
+    drop_stale_landmarks()
+
+
+def add_person(person_id, name, birth=""):
+    """
+    Add a person to the loaded data, and to its snapshot if there is one.
+    """
+    graph.add_person(person_id, name, birth)
+    drop_stale_landmarks()
+
+
+def add_movie(movie_id, title, year=""):
+    """
+    Add a movie to the loaded data, and to its snapshot if there is one.
     """
-    # Load people
-    with open(f"{directory}/people.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            people[row["id"]] = {
-                "name": row["name"],
-                "birth": row["birth"],
-                "movies": set()
-            }
-            if row["name"].lower() not in names:
-                names[row["name"].lower()] = {row["id"]}
-            else:
-                names[row["name"].lower()].add(row["id"])
-
-    # Load movies
-    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            movies[row["id"]] = {
-                "title": row["title"],
-                "year": row["year"],
-                "stars": set()
-            }
-
-    # Load stars
-    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
-            except KeyError:
-                pass
+    graph.add_movie(movie_id, title, year)
+
+
+def add_star(person_id, movie_id):
+    """
+    Record that a person starred in a movie in the loaded data, and in
+    its snapshot if there is one. Raises KeyError if either is unknown.
+    """
+    if graph.add_star(person_id, movie_id):
+        drop_stale_landmarks()
+
+
+def drop_stale_landmarks():
+    """
+    Stop using the landmark index once the graph has grown past it or its
+    CSV files have changed, since new or rewired links can make its bounds
+    wrong.
+    """
+    global landmark_index
+    if landmark_index is not None and not landmark_index.matches(graph):
+        landmark_index = None
+
+
+def load_landmarks(directory, count=16):
+    """
+    Load the landmark index kept next to the CSV files in `directory`,
+    building it from the loaded data first if it is missing or stale.
+    """
+    global landmark_index
+    path = os.path.join(directory, landmarks.LANDMARKS_NAME)
+    index = landmarks.load(path)
+    if index is None or not index.matches(graph):
+        index = landmarks.build(graph, count)
+        try:
+            index.save(path)
+        except OSError:
+            pass
+    landmark_index = index
 
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    parser = argparse.ArgumentParser(
+        description="Find the degrees of separation between two people."
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument(
+        "--bidirectional", action="store_true",
+        help="search from both people at once"
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true",
+        help="always parse the CSV files instead of using a snapshot"
+    )
+    parser.add_argument(
+        "--landmarks", action="store_true",
+        help="guide the search with a landmark distance index"
+    )
+    parser.add_argument(
+        "--components", action="store_true",
+        help="report the sizes of the connected components and exit"
+    )
+    parser.add_argument(
+        "--all", type=int, default=1, metavar="LIMIT",
+        help="list up to this many distinct shortest paths"
+    )
+    parser.add_argument(
+        "--years", type=year_range, metavar="FIRST-LAST",
+        help="only use movies released in this range of years, e.g. 1990-1999; "
+             "leave out either end for an open range, e.g. 1990-"
+    )
+    parser.add_argument(
+        "--exclude", action="append", default=[], metavar="MOVIE",
+        help="never use this movie, given by title or IMDB id (repeatable)"
+    )
+    parser.add_argument(
+        "--stats", action="store_true",
+        help="print what the search did: people expanded, frontier size "
+             "and time per level"
+    )
+    parser.add_argument(
+        "--stats-json", metavar="FILE",
+        help="write what the search did to this file as JSON, or - for stdout"
+    )
+    args = parser.parse_args()
+    if args.all > 1 and (args.stats or args.stats_json):
+        parser.error("--stats and --stats-json cannot be used with --all")
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    report = load_data(args.directory, cache=not args.no_cache)
+    if report is not None:
+        for line in report.lines():
+            print(line)
+    if args.landmarks:
+        load_landmarks(args.directory)
     print("Data loaded.")
 
+    if args.components:
+        print_components()
+        return
+
     source = person_id_for_name(input("Name: "))
     if source is None:
         sys.exit("Person not found.")
@@ -69,34 +187,308 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    allowed = None
+    if args.years or args.exclude:
+        first_year, last_year = args.years or (None, None)
+        allowed = movie_filter(first_year, last_year, args.exclude)
 
-    if path is None:
+    if args.all > 1:
+        print_all_paths(source, target, args.all, allowed)
+        return
+
+    method = "bidirectional" if args.bidirectional else None
+    stats = SearchStats() if args.stats or args.stats_json else None
+    path = shortest_path(
+        source, target, method=method, allowed_movies=allowed, stats=stats
+    )
+
+    if path is None and allowed is not None:
+        print("Not connected through the allowed movies.")
+    elif path is None:
         print("Not connected.")
+        for person_id in (source, target):
+            size = component_size(person_id)
+            print(f"{people[person_id]['name']} is connected to {size - 1} other people.")
     else:
         degrees = len(path)
         print(f"{degrees} degrees of separation.")
-        path = [(None, source)] + path
-        for i in range(degrees):
-            person1 = people[path[i][1]]["name"]
-            person2 = people[path[i + 1][1]]["name"]
-            movie = movies[path[i + 1][0]]["title"]
-            print(f"{i + 1}: {person1} and {person2} starred in {movie}")
+        print_path(source, path)
+
+    if args.stats:
+        for line in stats.lines():
+            print(line)
+    if args.stats_json == "-":
+        print(json.dumps(stats.as_dict()))
+    elif args.stats_json:
+        with open(args.stats_json, "w", encoding="utf-8") as f:
+            json.dump(stats.as_dict(), f, indent=2)
+
 
-def shortest_path(source, target):
+def year_range(text):
+    """
+    Parses a --years argument of the form FIRST-LAST into a (first, last)
+    pair of years, either of which is None if left out, as in "1990-".
+    """
+    first, dash, last = text.strip().partition("-")
+    if not dash or not (first or last):
+        raise argparse.ArgumentTypeError(
+            f"expected FIRST-LAST, FIRST- or -LAST, not {text!r}"
+        )
+    try:
+        first = int(first) if first else None
+        last = int(last) if last else None
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"years must be whole numbers, not {text!r}"
+        ) from None
+    if first is not None and last is not None and first > last:
+        raise argparse.ArgumentTypeError(f"{first} comes after {last}")
+    return first, last
+
+
+def print_path(source, path):
+    """
+    Print each step of a path of (movie_id, person_id) pairs from source.
+    """
+    path = [(None, source)] + path
+    for i in range(len(path) - 1):
+        person1 = people[path[i][1]]["name"]
+        person2 = people[path[i + 1][1]]["name"]
+        movie = movies[path[i + 1][0]]["title"]
+        print(f"{i + 1}: {person1} and {person2} starred in {movie}")
+
+
+def print_all_paths(source, target, limit, allowed=None):
+    """
+    Print up to `limit` distinct shortest paths from source to target.
+    """
+    count = 0
+    for path in all_shortest_paths(source, target, limit, allowed):
+        if count == 0:
+            print(f"{len(path)} degrees of separation.")
+        count += 1
+        print(f"Path {count}:")
+        print_path(source, path)
+    if count == 0:
+        print("Not connected.")
+
+
+def print_components(limit=10):
+    """
+    Print how many connected components there are and the largest sizes.
+    """
+    sizes = graph.component_sizes()
+    print(f"{len(sizes)} connected components.")
+    for rank, size in enumerate(sizes[:limit], start=1):
+        print(f"{rank}: {size} people")
+    isolated = sum(1 for size in sizes if size == 1)
+    print(f"{isolated} people share no movie with anyone.")
+
+
+def component_size(person_id):
+    """
+    Returns the number of people in the connected component of a person_id,
+    including that person.
+    """
+    person = graph.person_index(person_id)
+    if person is None:
+        raise KeyError(person_id)
+    return graph.component_size[graph.component_of(person)]
+
+
+def movie_filter(first_year=None, last_year=None, exclude=()):
+    """
+    Returns a mask over movies for shortest_path's `allowed_movies`, that
+    keeps only movies released from `first_year` to `last_year` inclusive
+    (either may be None) and drops every movie in `exclude`, given by
+    IMDB id or by title.
+
+    Building the mask takes one pass over the movies; searching with it
+    afterwards costs no more than searching without it.
+    """
+    excluded = set()
+    titles = set()
+    for movie_id in exclude:
+        movie = graph.movie_index(movie_id)
+        if movie is None:
+            titles.add(movie_id.lower())
+        else:
+            excluded.add(movie)
+    if titles:
+        excluded.update(
+            movie for movie, title in enumerate(graph.movie_titles)
+            if title.lower() in titles
+        )
+    return movie_mask(graph, first_year, last_year, excluded)
+
+
+def shortest_path(source, target, method=None, allowed_movies=None, stats=None):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
+    `method` is either "bfs", which searches outwards from the source,
+    "bidirectional", which grows a frontier from each end and stops
+    when they meet, or "astar", which is guided by the landmark index.
+    By default "astar" is used if a landmark index is loaded, and "bfs"
+    otherwise.
+
+    If `allowed_movies` is given, the path only goes through the movies
+    it allows; see movie_filter.
+
+    If `stats` is a SearchStats, the search records what it did in it.
+    It is left untouched when no search is needed.
+
     If no possible path, returns None.
     """
     # If the source and target are the same we return an empty path
     if source == target:
         return []
 
+    source = graph.person_index(source)
+    target = graph.person_index(target)
+    if source is None or target is None:
+        return None
+
+    # People in different components are never connected
+    if not graph.connected(source, target):
+        return None
+
+    if method is None:
+        method = "bfs" if landmark_index is None else "astar"
+
+    if method not in ("bfs", "bidirectional", "astar"):
+        raise ValueError(f"unknown search method: {method}")
+    if method == "astar" and landmark_index is None:
+        raise ValueError("astar search needs a landmark index")
+
+    if stats is not None:
+        stats.start(method)
+    if method == "bfs":
+        path = breadth_first_search(
+            source, target, allowed=allowed_movies, stats=stats
+        )
+    elif method == "bidirectional":
+        path = bidirectional_search(source, target, allowed_movies, stats)
+    else:
+        path = astar_search(source, target, landmark_index, allowed_movies, stats)
+
+    if path is None:
+        return None
+    return [
+        (graph.movie_ids[movie], graph.person_ids[person])
+        for movie, person in path
+    ]
+
+
+def all_shortest_paths(source, target, limit=None, allowed_movies=None):
+    """
+    Yields every distinct shortest list of (movie_id, person_id) pairs
+    that connects the source to the target, up to `limit` of them, only
+    through the movies `allowed_movies` allows, if given.
+
+    A single breadth-first search records every way each person can be
+    reached in the fewest steps; paths are then read out of that record
+    one at a time, so stopping early never builds the rest.
+
+    Yields nothing if no path exists.
+    """
+    if limit is not None and limit <= 0:
+        return
+    if source == target:
+        yield []
+        return
+
+    source = graph.person_index(source)
+    target = graph.person_index(target)
+    if source is None or target is None or not graph.connected(source, target):
+        return
+
+    parents = shortest_path_parents(source, target, allowed_movies)
+    if parents is None:
+        return
+
+    count = 0
+    for path in parent_paths(parents, source, target):
+        yield [
+            (graph.movie_ids[movie], graph.person_ids[person])
+            for movie, person in path
+        ]
+        count += 1
+        if limit is not None and count >= limit:
+            return
+
+
+def shortest_path_parents(source, target, allowed=None):
+    """
+    Runs a breadth-first search from the source index until the level
+    holding the target index is complete.
+
+    Returns a dictionary mapping every person reached to the list of
+    (movie, person) steps that reach it from the level before, or None
+    if the target cannot be reached.
+    """
+    depths = {source: 0}
+    parents = {source: []}
+    level = [source]
+    depth = 0
+    while level and target not in depths:
+        depth += 1
+        next_level = []
+        for person in level:
+            for movie, neighbor in graph.neighbors(person, allowed):
+                if neighbor not in depths:
+                    depths[neighbor] = depth
+                    parents[neighbor] = [(movie, person)]
+                    next_level.append(neighbor)
+                elif depths[neighbor] == depth:
+                    parents[neighbor].append((movie, person))
+        level = next_level
+    return parents if target in depths else None
+
+
+def parent_paths(parents, source, target):
+    """
+    Yields each list of (movie, person) index pairs from the source to the
+    target that follows the steps recorded in `parents`.
+    """
+    # Walking back from the target depth-first; steps[k] is the step into
+    # the person of stack frame k, so there is one step fewer than frames
+    stack = [(target, iter(parents[target]))]
+    steps = []
+    while stack:
+        person, options = stack[-1]
+        step = None if person == source else next(options, None)
+        if step is None:
+            if person == source:
+                yield steps[::-1]
+            stack.pop()
+            if steps:
+                steps.pop()
+            continue
+        movie, parent = step
+        steps.append((movie, person))
+        stack.append((parent, iter(parents[parent])))
+
+
+def breadth_first_search(source, target, frontier=None, allowed=None, stats=None):
+    """
+    Returns the shortest list of (movie, person) index pairs that connect
+    the source index to the target index, searching outwards from the
+    source and only through the movies `allowed` allows, if given.
+
+    `frontier` is an empty queue frontier to search with; passing one in
+    lets the caller read its counters once the search is over. `stats`
+    is an optional SearchStats to record the search in.
+
+    If no possible path, returns None.
+    """
+    neighbors = graph.neighbors if stats is None else stats.counted(graph.neighbors)
+
     # Initializing the frontier with the initial state
     start = Node(state=source, parent=None, action=None)
-    frontier = QueueFrontier()
+    if frontier is None:
+        frontier = DequeQueueFrontier()
     frontier.add(start)
 
     # Initializing an empty explored set
@@ -105,34 +497,239 @@ def shortest_path(source, target):
     while not frontier.empty():
         # Removing a node from the frontier
         node = frontier.remove()
+        if stats is not None:
+            stats.expand(node_depth(node), len(frontier.frontier) + 1)
 
         # Marking node as explored
         explored.add(node.state)
 
         # Adding neighbors to the frontier
-        for movie_id, person_id in neighbors_for_person(node.state):
-            if person_id == target:
+        for movie, person in neighbors(node.state, allowed):
+            if person == target:
+                if stats is not None:
+                    # Everyone explored or waiting, less the source, plus the target
+                    stats.finish(len(explored) + len(frontier.frontier))
+
                 # If the neighbor is the target we build the path and return it
-                path = [(movie_id, person_id)]
+                path = [(movie, person)]
                 while node.parent is not None:
                     path.append((node.action, node.state))
                     node = node.parent
                 path.reverse()
                 return path
 
-            if not frontier.contains_state(person_id) and person_id not in explored:
-                child = Node(state=person_id, parent=node, action=movie_id)
+            if not frontier.contains_state(person) and person not in explored:
+                child = Node(state=person, parent=node, action=movie)
                 frontier.add(child)
 
+    if stats is not None:
+        stats.finish(len(explored) - 1)
     return None
 
+
+def node_depth(node):
+    """
+    Returns the number of steps from the root of the search to `node`.
+    """
+    depth = 0
+    while node.parent is not None:
+        node = node.parent
+        depth += 1
+    return depth
+
+
+def astar_search(source, target, index, allowed=None, stats=None):
+    """
+    Returns the shortest list of (movie, person) index pairs that connect
+    the source index to the target index, only through the movies
+    `allowed` allows, if given. People are expanded in order of their
+    distance from the source plus the landmark lower bound on their
+    distance to the target.
+
+    The landmark bound never overestimates and never drops by more than
+    one between co-stars, even with some movies left out, so the first
+    time the target is removed from the queue its path is a shortest one.
+
+    `stats` is an optional SearchStats to record the search in.
+
+    If no possible path, returns None.
+    """
+    neighbors = graph.neighbors if stats is None else stats.counted(graph.neighbors)
+    estimate = index.heuristic(target)
+    if estimate(source) == math.inf:
+        if stats is not None:
+            stats.finish(0)
+        return None
+
+    # Queue entries are (estimated total, -cost, person), so that among
+    # equally promising people the deepest one is expanded first
+    queue = [(estimate(source), 0, source)]
+    costs = {source: 0}
+    parents = {source: None}
+
+    while queue:
+        _, cost, person = heapq.heappop(queue)
+        cost = -cost
+        if cost > costs[person]:
+            continue
+        if stats is not None:
+            stats.expand(cost, len(queue) + 1)
+
+        if person == target:
+            if stats is not None:
+                stats.finish(len(costs) - 1)
+            path = []
+            while parents[person] is not None:
+                movie, parent = parents[person]
+                path.append((movie, person))
+                person = parent
+            path.reverse()
+            return path
+
+        for movie, neighbor in neighbors(person, allowed):
+            if neighbor in costs and costs[neighbor] <= cost + 1:
+                continue
+            bound = estimate(neighbor)
+            if bound == math.inf:
+                continue
+            costs[neighbor] = cost + 1
+            parents[neighbor] = (movie, person)
+            heapq.heappush(queue, (cost + 1 + bound, -(cost + 1), neighbor))
+
+    if stats is not None:
+        stats.finish(len(costs) - 1)
+    return None
+
+
+def bidirectional_search(source, target, allowed=None, stats=None):
+    """
+    Returns the shortest list of (movie, person) index pairs that connect
+    the source index to the target index, searching from both ends at once
+    and only through the movies `allowed` allows, if given.
+
+    Each round expands one whole level of the smaller frontier, so the
+    first time the two searches meet the path through the meeting point
+    is a shortest one. `stats` is an optional SearchStats to record the
+    search in, counting each round as one level.
+
+    If no possible path, returns None.
+    """
+    # Each side maps a reached person to the (movie, person) step
+    # that leads back towards where that side started
+    forward = {source: None}
+    backward = {target: None}
+    forward_level = [source]
+    backward_level = [target]
+    rounds = 0
+
+    while forward_level and backward_level:
+        if stats is not None:
+            stats.expand(
+                rounds, len(forward_level) + len(backward_level),
+                min(len(forward_level), len(backward_level))
+            )
+        rounds += 1
+
+        # Always expanding the cheaper side
+        if len(forward_level) <= len(backward_level):
+            forward_level, meet = expand_level(
+                forward_level, forward, backward, allowed, stats
+            )
+        else:
+            backward_level, meet = expand_level(
+                backward_level, backward, forward, allowed, stats
+            )
+
+        if meet is not None:
+            if stats is not None:
+                stats.finish(len(forward) + len(backward) - 2)
+            return join_paths(meet, forward, backward)
+
+    if stats is not None:
+        stats.finish(len(forward) + len(backward) - 2)
+    return None
+
+
+def expand_level(level, parents, other_parents, allowed=None, stats=None):
+    """
+    Expands every person in `level` through the movies `allowed` allows,
+    recording how each new person was reached in `parents`, and counting
+    the neighbors generated in `stats`, if given.
+
+    Returns the next level and the first person that the other side of
+    the search has already reached, or None if the two sides did not meet.
+    """
+    neighbors = graph.neighbors if stats is None else stats.counted(graph.neighbors)
+    next_level = []
+    for person in level:
+        for movie, neighbor in neighbors(person, allowed):
+            if neighbor in parents:
+                continue
+            parents[neighbor] = (movie, person)
+            if neighbor in other_parents:
+                return next_level, neighbor
+            next_level.append(neighbor)
+    return next_level, None
+
+
+def join_paths(meet, forward, backward):
+    """
+    Builds the (movie, person) path through `meet` out of the parent
+    maps filled in by the forward and backward searches.
+    """
+    # Walking from the meeting point back to the source
+    path = []
+    person = meet
+    while forward[person] is not None:
+        movie, parent = forward[person]
+        path.append((movie, person))
+        person = parent
+    path.reverse()
+
+    # Walking from the meeting point on to the target
+    person = meet
+    while backward[person] is not None:
+        movie, following = backward[person]
+        path.append((movie, following))
+        person = following
+    return path
+
+
+def degree_bounds(source, target):
+    """
+    Returns (lower, upper) bounds on the degrees of separation between
+    two person_ids, read from the landmark index without searching.
+
+    The lower bound is math.inf if the two are known not to be connected,
+    and the upper bound is math.inf if no landmark reaches both.
+    """
+    if landmark_index is None:
+        raise ValueError("degree_bounds needs a landmark index")
+    if source == target:
+        return 0, 0
+    source_index = graph.person_index(source)
+    target_index = graph.person_index(target)
+    if source_index is None:
+        raise KeyError(source)
+    if target_index is None:
+        raise KeyError(target)
+    if not graph.connected(source_index, target_index):
+        return math.inf, math.inf
+    lower, upper = landmark_index.bounds(source_index, target_index)
+    return max(lower, 1), upper
+
+
 def person_id_for_name(name):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
     """
-    person_ids = list(names.get(name.lower(), set()))
+    person_ids = person_ids_for_name(name)
     if len(person_ids) == 0:
+        suggestions = similar_names(name, limit=5)
+        if suggestions:
+            choices = ", ".join(people[person_id]["name"] for person_id in suggestions)
+            print(f"Did you mean: {choices}?")
         return None
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
@@ -152,17 +749,62 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def person_ids_for_name(name):
+    """
+    Returns the IMDB ids of everyone with a person's name, ignoring case,
+    most prolific first.
+    """
+    return [graph.person_ids[person] for person in name_index.exact(name)]
+
+
+def complete_name(prefix, limit=10):
+    """
+    Returns the IMDB ids of up to `limit` people whose names start with
+    `prefix`, ignoring case, most prolific first.
+    """
+    return [graph.person_ids[person] for person in name_index.prefix(prefix, limit)]
+
+
+def similar_names(name, max_distance=2, limit=10):
+    """
+    Returns the IMDB ids of up to `limit` people whose names are within
+    `max_distance` edits of `name`, ignoring case, closest first.
+    """
+    return [
+        graph.person_ids[person]
+        for person in name_index.fuzzy(name, max_distance, limit)
+    ]
+
+
+def resolve_person(text):
+    """
+    Returns the person_id for `text`, which is either an IMDB id or a name
+    that exactly one person has. Raises LookupError otherwise, rather
+    than asking which person was meant.
+    """
+    if graph.person_index(text) is not None:
+        return text
+    person_ids = person_ids_for_name(text)
+    if len(person_ids) == 0:
+        raise LookupError(f"{text}: person not found")
+    if len(person_ids) > 1:
+        ids = ", ".join(sorted(person_ids))
+        raise LookupError(f"{text}: name is ambiguous between {ids}")
+    return person_ids[0]
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
-    movie_ids = people[person_id]["movies"]
-    neighbors = set()
-    for movie_id in movie_ids:
-        for person_id in movies[movie_id]["stars"]:
-            neighbors.add((movie_id, person_id))
-    return neighbors
+    person = graph.person_index(person_id)
+    if person is None:
+        raise KeyError(person_id)
+    return {
+        (graph.movie_ids[movie], graph.person_ids[neighbor])
+        for movie, neighbor in graph.neighbors(person)
+    }
 
 
 if __name__ == "__main__":
@@ -0,0 +1,165 @@
+import argparse
+import csv
+import os
+import random
+from itertools import accumulate
+
+FIRST_NAMES = (
+    "Adam", "Alice", "Amy", "Ben", "Carla", "Chris", "Dana", "David", "Elena",
+    "Emma", "Frank", "Grace", "Hana", "Ian", "Jack", "Julia", "Karen", "Kevin",
+    "Laura", "Leo", "Maria", "Mark", "Nina", "Omar", "Paul", "Rosa", "Sam",
+    "Sara", "Tom", "Uma", "Victor", "Wendy", "Yusuf", "Zoe"
+)
+
+LAST_NAMES = (
+    "Adams", "Bacon", "Brown", "Chen", "Cruise", "Davis", "Evans", "Garcia",
+    "Hanks", "Hoffman", "Ito", "Jones", "Khan", "Kim", "Lee", "Lopez", "Martin",
+    "Miller", "Moore", "Nguyen", "Novak", "Patel", "Rossi", "Silva", "Smith",
+    "Stone", "Taylor", "Walker", "White", "Wilson", "Young"
+)
+
+TITLE_WORDS = (
+    "Apollo", "Blue", "City", "Dark", "Dream", "Edge", "Fire", "Game", "Heart",
+    "Home", "Last", "Light", "Men", "Night", "River", "Road", "Secret", "Star",
+    "Storm", "Summer", "Time", "War", "Water", "Wild", "World"
+)
+
+# Movie and person ids count up from here, so they look like IMDB's
+FIRST_ID = 100000
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Write synthetic people.csv, movies.csv and stars.csv "
+                    "files with power-law cast sizes and careers."
+    )
+    parser.add_argument("directory")
+    parser.add_argument(
+        "--credits", type=int, default=1_000_000,
+        help="number of rows to write to stars.csv"
+    )
+    parser.add_argument(
+        "--credits-per-person", type=float, default=4.0,
+        help="average number of movies per person, which sets how many "
+             "people there are"
+    )
+    parser.add_argument(
+        "--cast-exponent", type=float, default=2.2,
+        help="exponent of the power law cast sizes are drawn from"
+    )
+    parser.add_argument(
+        "--career-exponent", type=float, default=0.8,
+        help="exponent of the Zipf law deciding how often each person is cast"
+    )
+    parser.add_argument(
+        "--min-cast", type=int, default=2,
+        help="smallest cast a movie can have; with 1, about one person in "
+             "twenty shares no movie with anyone"
+    )
+    parser.add_argument("--max-cast", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    if not 1 <= args.min_cast <= args.max_cast:
+        parser.error("--min-cast must be at least 1 and at most --max-cast")
+
+    counts = generate(
+        args.directory, args.credits, args.credits_per_person,
+        args.cast_exponent, args.career_exponent, args.max_cast, args.seed,
+        args.min_cast
+    )
+    print("Wrote {} people, {} movies and {} stars to {}.".format(
+        *counts, args.directory
+    ))
+
+
+def generate(directory, credits, credits_per_person=4.0, cast_exponent=2.2,
+             career_exponent=0.8, max_cast=100, seed=0, min_cast=2):
+    """
+    Write synthetic CSV files to `directory` with about `credits` rows of
+    stars, the same `seed` always giving the same files.
+
+    Cast sizes follow a power law with `cast_exponent` from `min_cast` up,
+    so most movies have a handful of stars and a few up to `max_cast`. Each
+    cast is drawn from all the people with Zipf weights of `career_exponent`,
+    so a few people star in very many movies and most in one or two, much
+    as in IMDB. Everyone is cast at least once, at a random point in the
+    file, since Zipf weights alone would leave about a fifth of people with
+    no movies; with a `min_cast` of 1, some would still share a movie with
+    no one.
+
+    Returns the number of people, movies and stars written.
+    """
+    os.makedirs(directory, exist_ok=True)
+    random_data = random.Random(seed)
+    people = max(1, round(credits / credits_per_person))
+
+    # Who gets which popularity rank is shuffled, so ids say nothing of it
+    ranked = list(range(people))
+    random_data.shuffle(ranked)
+    weights = list(accumulate(
+        1 / (rank + 1) ** career_exponent for rank in range(people)
+    ))
+
+    # People not cast yet, in the order they get their first role
+    debuts = list(range(people))
+    random_data.shuffle(debuts)
+
+    with open(os.path.join(directory, "people.csv"), "w",
+              encoding="utf-8", newline="") as f:
+        f.write("id,name,birth\n")
+        writer = csv.writer(f, quoting=csv.QUOTE_NONNUMERIC)
+        for person in range(people):
+            name = (f"{random_data.choice(FIRST_NAMES)} "
+                    f"{random_data.choice(LAST_NAMES)}")
+            # Some people, as in IMDB, have no known birth year
+            birth = random_data.randint(1900, 2005) if random_data.random() < 0.8 else ""
+            writer.writerow([FIRST_ID + person, name, birth])
+
+    movies = 0
+    stars = 0
+    with open(os.path.join(directory, "movies.csv"), "w",
+              encoding="utf-8", newline="") as movies_file, \
+            open(os.path.join(directory, "stars.csv"), "w",
+                 encoding="utf-8", newline="") as stars_file:
+        movies_file.write("id,title,year\n")
+        stars_file.write("person_id,movie_id\n")
+        movie_writer = csv.writer(movies_file, quoting=csv.QUOTE_NONNUMERIC)
+        star_writer = csv.writer(stars_file)
+
+        while stars < credits:
+            movie = FIRST_ID + movies
+            title = " ".join(random_data.sample(TITLE_WORDS, random_data.randint(1, 3)))
+            movie_writer.writerow([movie, title, random_data.randint(1920, 2024)])
+            movies += 1
+
+            size = cast_size(random_data, cast_exponent, min_cast, max_cast)
+            size = min(size, people, credits - stars)
+            cast = set()
+
+            # Each slot goes to someone's debut with the chance that spreads
+            # the remaining debuts evenly over the remaining credits
+            for _ in range(size):
+                remaining = credits - stars - len(cast)
+                if debuts and random_data.random() * remaining < len(debuts):
+                    cast.add(debuts.pop())
+            while len(cast) < size:
+                drawn = random_data.choices(ranked, cum_weights=weights, k=size - len(cast))
+                cast.update(drawn)
+            for person in sorted(cast):
+                star_writer.writerow([FIRST_ID + person, movie])
+            stars += size
+
+    return people, movies, stars
+
+
+def cast_size(random_data, exponent, minimum, maximum):
+    """
+    Returns a cast size from `minimum` to `maximum`, drawn from a discrete
+    power law with `exponent` by inverting its distribution.
+    """
+    size = int(minimum * (1 - random_data.random()) ** (-1 / (exponent - 1)))
+    return min(size, maximum)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,755 @@
+import csv
+import io
+import os
+import sys
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Mapping
+from itertools import islice
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, where peak memory goes unreported
+    resource = None
+
+# Number of CSV rows parsed at a time while loading
+CHUNK_ROWS = 65536
+
+
+class Graph():
+    """
+    People and the movies they starred in, stored as flat arrays.
+
+    Every person and movie gets a dense integer index in the order it was
+    read. Adjacency is kept in compressed sparse row (CSR) form in both
+    directions: the movies of person `p` are
+    `person_movies[person_offsets[p]:person_offsets[p + 1]]` and the stars
+    of movie `m` are `movie_stars[movie_offsets[m]:movie_offsets[m + 1]]`.
+
+    People, movies and stars added after the graph was built are kept in
+    small overlay dictionaries next to the arrays, so that adding them
+    costs time proportional to what was added; see add_person, add_movie
+    and add_star.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        """
+        Forget everything that has been loaded.
+        """
+        # Columns for people and movies, indexed by their dense integer ids
+        self.person_ids = []
+        self.person_names = []
+        self.person_births = array("H")
+        self.movie_ids = []
+        self.movie_titles = []
+        self.movie_years = array("H")
+
+        # Adjacency in both directions
+        self.person_offsets = array("q", [0])
+        self.person_movies = array("i")
+        self.movie_offsets = array("q", [0])
+        self.movie_stars = array("i")
+
+        # Indices sorted by IMDB id and by lower-cased name, for lookups
+        self.person_order = array("i")
+        self.movie_order = array("i")
+        self.name_order = array("i")
+
+        # Connected components: the representative person of each person's
+        # component, and the size of each component by representative
+        self.component = array("i")
+        self.component_size = array("i")
+
+        # Additions since the arrays were built: extra movies per person,
+        # extra stars per movie, and lookups for people and movies whose
+        # indices are not in the sorted orders
+        self.extra_movies = {}
+        self.extra_stars = {}
+        self.extra_people = {}
+        self.extra_movie_ids = {}
+        self.extra_names = {}
+
+        # Memory-mapped snapshot the arrays above are views into, if any
+        self.mapping = None
+
+        # Object with a record(entry) method told about every addition
+        self.journal = None
+
+        # Fingerprints of the CSV files the graph was loaded from, if known
+        self.sources = None
+
+    def load_csv(self, directory):
+        """
+        Load people, movies and stars from the CSV files in `directory`.
+
+        Each file is parsed in chunks of rows straight into arrays sized
+        from its line count, keeping only the columns searches need, and
+        birth and release years as small integers rather than strings.
+        Returns a LoadReport of how it went.
+        """
+        self.clear()
+        report = LoadReport()
+        started = time.perf_counter()
+
+        # Load people
+        rows = count_lines(f"{directory}/people.csv")
+        self.person_ids = [None] * rows
+        self.person_names = [None] * rows
+        self.person_births = array("H", bytes(2 * rows))
+        person_lookup = {}
+        people = 0
+        columns = ("id", "name", "birth")
+        for chunk in read_chunks(f"{directory}/people.csv", columns, report=report):
+            for person_id, name, birth in chunk:
+                person_lookup[person_id] = people
+                self.person_ids[people] = person_id
+                self.person_names[people] = name
+                self.person_births[people] = parse_year(birth)
+                people += 1
+        del self.person_ids[people:], self.person_names[people:]
+        del self.person_births[people:]
+        report.rows["people.csv"] = people
+
+        # Load movies
+        rows = count_lines(f"{directory}/movies.csv")
+        self.movie_ids = [None] * rows
+        self.movie_titles = [None] * rows
+        self.movie_years = array("H", bytes(2 * rows))
+        movie_lookup = {}
+        movies = 0
+        columns = ("id", "title", "year")
+        for chunk in read_chunks(f"{directory}/movies.csv", columns, report=report):
+            for movie_id, title, year in chunk:
+                movie_lookup[movie_id] = movies
+                self.movie_ids[movies] = movie_id
+                self.movie_titles[movies] = title
+                self.movie_years[movies] = parse_year(year)
+                movies += 1
+        del self.movie_ids[movies:], self.movie_titles[movies:]
+        del self.movie_years[movies:]
+        report.rows["movies.csv"] = movies
+
+        # Load stars as two parallel arrays of (person, movie) edges,
+        # counting the rows that name someone or something unknown
+        rows = count_lines(f"{directory}/stars.csv")
+        edge_people = array("i", bytes(4 * rows))
+        edge_movies = array("i", bytes(4 * rows))
+        edges = 0
+        stars = 0
+        columns = ("person_id", "movie_id")
+        for chunk in read_chunks(f"{directory}/stars.csv", columns, report=report):
+            stars += len(chunk)
+            for person_id, movie_id in chunk:
+                person = person_lookup.get(person_id)
+                movie = movie_lookup.get(movie_id)
+                if person is None:
+                    report.unknown_people += 1
+                if movie is None:
+                    report.unknown_movies += 1
+                if person is None or movie is None:
+                    report.skipped_stars += 1
+                    continue
+                edge_people[edges] = person
+                edge_movies[edges] = movie
+                edges += 1
+        del edge_people[edges:], edge_movies[edges:]
+        report.rows["stars.csv"] = stars
+
+        # The lookups are only needed while reading stars
+        del person_lookup, movie_lookup
+        self.build(edge_people, edge_movies)
+
+        report.seconds = time.perf_counter() - started
+        report.peak_rss = peak_rss()
+        return report
+
+    def build(self, edge_people, edge_movies):
+        """
+        Build the adjacency and lookup orders from parallel arrays of
+        (person, movie) edges, once the columns have been filled in.
+        """
+        self.person_offsets, self.person_movies = group_edges(
+            edge_people, edge_movies, len(self.person_ids), unique=True
+        )
+        self.movie_offsets, self.movie_stars = group_edges(
+            self.person_movies, expand_offsets(self.person_offsets),
+            len(self.movie_ids)
+        )
+
+        self.person_order = sorted_indices(self.person_ids)
+        self.movie_order = sorted_indices(self.movie_ids)
+        self.name_order = sorted_indices(self.person_names, key=str.lower)
+
+        self.build_components()
+
+    def build_components(self):
+        """
+        Label every person with the component they belong to, by merging
+        the casts of every movie in a union-find forest.
+        """
+        people = len(self.person_ids)
+        parent = array("i", range(people))
+        size = array("i", [1]) * people
+        for movie in range(len(self.movie_ids)):
+            stars = self.stars_of(movie)
+            for star in stars[1:]:
+                union(parent, size, stars[0], star)
+
+        # Pointing everyone straight at their representative
+        for person in range(people):
+            parent[person] = find(parent, person)
+        self.component = parent
+        self.component_size = size
+
+    def connected(self, source, target):
+        """
+        Returns True if there is any path between two person indices.
+        """
+        return self.component_of(source) == self.component_of(target)
+
+    def component_of(self, person):
+        """
+        Returns the representative person of the component of `person`.
+        """
+        if not (self.extra_movies or self.extra_stars):
+            # Nothing has been merged since everyone was labelled
+            return self.component[person]
+        return find(self.component, person)
+
+    def component_sizes(self):
+        """
+        Returns the size of every connected component, largest first.
+        """
+        return sorted(
+            (self.component_size[person]
+             for person in range(len(self.component))
+             if self.component[person] == person),
+            reverse=True
+        )
+
+    def person_index(self, person_id):
+        """
+        Returns the index of the person with IMDB id `person_id`,
+        or None if there is no such person.
+        """
+        person = find_index(self.person_order, self.person_ids, person_id)
+        if person is None:
+            return self.extra_people.get(person_id)
+        return person
+
+    def movie_index(self, movie_id):
+        """
+        Returns the index of the movie with IMDB id `movie_id`,
+        or None if there is no such movie.
+        """
+        movie = find_index(self.movie_order, self.movie_ids, movie_id)
+        if movie is None:
+            return self.extra_movie_ids.get(movie_id)
+        return movie
+
+    def people_named(self, name):
+        """
+        Returns the indices of every person whose name, ignoring case,
+        is `name`.
+        """
+        key = name.lower()
+        lower_name = self.lower_name
+        start = bisect_left(self.name_order, key, key=lower_name)
+        end = bisect_right(self.name_order, key, lo=start, key=lower_name)
+        return list(self.name_order[start:end]) + self.extra_names.get(key, [])
+
+    def lower_name(self, person):
+        """Returns the lower-cased name of `person`."""
+        return self.person_names[person].lower()
+
+    def movies_of(self, person):
+        """Returns the indices of the movies `person` starred in."""
+        offsets = self.person_offsets
+        movies = self.person_movies[offsets[person]:offsets[person + 1]]
+        extra = self.extra_movies.get(person)
+        return movies if extra is None else list(movies) + extra
+
+    def stars_of(self, movie):
+        """Returns the indices of the people who starred in `movie`."""
+        offsets = self.movie_offsets
+        stars = self.movie_stars[offsets[movie]:offsets[movie + 1]]
+        extra = self.extra_stars.get(movie)
+        return stars if extra is None else list(stars) + extra
+
+    def movie_count(self, person):
+        """Returns the number of movies `person` starred in."""
+        offsets = self.person_offsets
+        count = offsets[person + 1] - offsets[person]
+        return count + len(self.extra_movies.get(person, ()))
+
+    def cast_size(self, movie):
+        """Returns the number of people who starred in `movie`."""
+        offsets = self.movie_offsets
+        count = offsets[movie + 1] - offsets[movie]
+        return count + len(self.extra_stars.get(movie, ()))
+
+    def star_count(self):
+        """Returns the number of (person, movie) credits in the graph."""
+        extra = sum(len(movies) for movies in self.extra_movies.values())
+        return len(self.person_movies) + extra
+
+    def add_person(self, person_id, name, birth=""):
+        """
+        Add a person with no movies yet, returning their index. Adding
+        someone who is already in the graph just returns their index.
+        """
+        person = self.person_index(person_id)
+        if person is not None:
+            return person
+        self.make_growable()
+
+        person = len(self.person_ids)
+        self.person_ids.append(person_id)
+        self.person_names.append(name)
+        self.person_births.append(parse_year(birth))
+        self.person_offsets.append(self.person_offsets[-1])
+        self.component.append(person)
+        self.component_size.append(1)
+        self.extra_people[person_id] = person
+        self.extra_names.setdefault(name.lower(), []).append(person)
+
+        if self.journal is not None:
+            self.journal.record(["person", person_id, name, birth])
+        return person
+
+    def add_movie(self, movie_id, title, year=""):
+        """
+        Add a movie with no stars yet, returning its index. Adding a movie
+        that is already in the graph just returns its index.
+        """
+        movie = self.movie_index(movie_id)
+        if movie is not None:
+            return movie
+        self.make_growable()
+
+        movie = len(self.movie_ids)
+        self.movie_ids.append(movie_id)
+        self.movie_titles.append(title)
+        self.movie_years.append(parse_year(year))
+        self.movie_offsets.append(self.movie_offsets[-1])
+        self.extra_movie_ids[movie_id] = movie
+
+        if self.journal is not None:
+            self.journal.record(["movie", movie_id, title, year])
+        return movie
+
+    def add_star(self, person_id, movie_id):
+        """
+        Record that a person starred in a movie, both given by IMDB id,
+        merging their components. Returns False if the credit was already
+        known. Raises KeyError if either id is unknown.
+        """
+        person = self.person_index(person_id)
+        if person is None:
+            raise KeyError(person_id)
+        movie = self.movie_index(movie_id)
+        if movie is None:
+            raise KeyError(movie_id)
+        if movie in self.movies_of(person):
+            return False
+        self.make_growable()
+
+        # Joining the component of anyone already in the movie
+        stars = self.stars_of(movie)
+        self.extra_movies.setdefault(person, []).append(movie)
+        self.extra_stars.setdefault(movie, []).append(person)
+        if len(stars) > 0:
+            union(self.component, self.component_size, stars[0], person)
+
+        if self.journal is not None:
+            self.journal.record(["star", person_id, movie_id])
+        return True
+
+    def compact(self):
+        """
+        Fold everything added since the arrays were built into them,
+        rebuilding the adjacency, sorted orders and components.
+        """
+        if not (self.extra_people or self.extra_movie_ids or self.extra_movies):
+            return
+        edge_people = array("i")
+        edge_movies = array("i")
+        for person in range(len(self.person_ids)):
+            movies = self.movies_of(person)
+            edge_people.extend([person] * len(movies))
+            edge_movies.extend(movies)
+
+        self.extra_movies = {}
+        self.extra_stars = {}
+        self.extra_people = {}
+        self.extra_movie_ids = {}
+        self.extra_names = {}
+        self.make_growable()
+        self.build(edge_people, edge_movies)
+
+    def make_growable(self):
+        """
+        Turn any columns that are read-only views into a snapshot into
+        arrays that can be appended to. The large edge arrays and sorted
+        orders stay where they are, since additions never touch them.
+        """
+        for name in (
+            "person_births", "movie_years", "person_offsets",
+            "movie_offsets", "component", "component_size"
+        ):
+            values = getattr(self, name)
+            if isinstance(values, memoryview):
+                copy = array(values.format)
+                copy.frombytes(values.cast("B"))
+                setattr(self, name, copy)
+
+    def neighbors(self, person, allowed=None):
+        """
+        Yields (movie, person) index pairs for everyone who starred in a
+        movie with `person`, including `person` themselves.
+
+        If `allowed` is given, only movies whose entry in it is set are
+        followed; see movie_mask. Movies added after the mask was built,
+        which it has no entry for, are not followed either.
+        """
+        person_offsets = self.person_offsets
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_stars = self.movie_stars
+        limit = 0 if allowed is None else len(allowed)
+        for i in range(person_offsets[person], person_offsets[person + 1]):
+            movie = person_movies[i]
+            if allowed is not None and (movie >= limit or not allowed[movie]):
+                continue
+            for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                yield movie, movie_stars[j]
+            if self.extra_stars:
+                for star in self.extra_stars.get(movie, ()):
+                    yield movie, star
+
+        # Movies added to this person since the arrays were built
+        if self.extra_movies:
+            for movie in self.extra_movies.get(person, ()):
+                if allowed is not None and (movie >= limit or not allowed[movie]):
+                    continue
+                for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                    yield movie, movie_stars[j]
+                for star in self.extra_stars.get(movie, ()):
+                    yield movie, star
+
+
+def movie_mask(graph, first_year=None, last_year=None, excluded=()):
+    """
+    Returns a bytearray with one entry per movie of `graph`, set for the
+    movies a constrained search may use: those released from `first_year`
+    to `last_year` inclusive, when given, and not among the `excluded`
+    movie indices. Movies with no known year are left out of any year range,
+    and movies added to the graph afterwards are left out altogether.
+    """
+    years = graph.movie_years
+    if first_year is None and last_year is None:
+        mask = bytearray(b"\x01") * len(years)
+    else:
+        low = 1 if first_year is None else first_year
+        high = 0xFFFF if last_year is None else last_year
+        mask = bytearray(low <= year <= high for year in years)
+    for movie in excluded:
+        mask[movie] = 0
+    return mask
+
+
+class LoadReport():
+    """
+    What happened while loading a graph from CSV files.
+    """
+
+    def __init__(self):
+        self.rows = {}
+        self.seconds = 0.0
+        self.peak_rss = None
+        self.unknown_people = 0
+        self.unknown_movies = 0
+        self.skipped_stars = 0
+
+        # Rows of each file skipped for having too few columns
+        self.short_rows = {}
+
+    def lines(self):
+        """
+        Returns the report as a list of human-readable lines.
+        """
+        lines = []
+        total = sum(self.rows.values())
+        rate = total / self.seconds if self.seconds else 0
+        lines.append(f"Parsed {total} rows in {self.seconds:.2f}s ({rate:.0f} rows/s).")
+        if self.peak_rss is not None:
+            lines.append(f"Peak memory: {self.peak_rss / 2 ** 20:.1f} MiB.")
+        if self.skipped_stars:
+            lines.append(
+                f"Skipped {self.skipped_stars} rows of stars.csv: "
+                f"{self.unknown_people} name an unknown person_id and "
+                f"{self.unknown_movies} an unknown movie_id."
+            )
+        for name, short in self.short_rows.items():
+            lines.append(f"Skipped {short} rows of {name} with too few columns.")
+        return lines
+
+
+class PeopleView(Mapping):
+    """
+    Read-only mapping from person_ids to a dictionary of: name, birth,
+    movies (a set of movie_ids), built on demand from a Graph.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, person_id):
+        person = self.graph.person_index(person_id)
+        if person is None:
+            raise KeyError(person_id)
+        return {
+            "name": self.graph.person_names[person],
+            "birth": format_year(self.graph.person_births[person]),
+            "movies": {
+                self.graph.movie_ids[movie]
+                for movie in self.graph.movies_of(person)
+            }
+        }
+
+    def __iter__(self):
+        return iter(self.graph.person_ids)
+
+    def __len__(self):
+        return len(self.graph.person_ids)
+
+
+class MoviesView(Mapping):
+    """
+    Read-only mapping from movie_ids to a dictionary of: title, year,
+    stars (a set of person_ids), built on demand from a Graph.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, movie_id):
+        movie = self.graph.movie_index(movie_id)
+        if movie is None:
+            raise KeyError(movie_id)
+        return {
+            "title": self.graph.movie_titles[movie],
+            "year": format_year(self.graph.movie_years[movie]),
+            "stars": {
+                self.graph.person_ids[person]
+                for person in self.graph.stars_of(movie)
+            }
+        }
+
+    def __iter__(self):
+        return iter(self.graph.movie_ids)
+
+    def __len__(self):
+        return len(self.graph.movie_ids)
+
+
+class NamesView(Mapping):
+    """
+    Read-only mapping from lower-cased names to the set of person_ids
+    with that name, backed by the name order of a Graph.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, name):
+        people = self.graph.people_named(name)
+        if not people or self.graph.lower_name(people[0]) != name:
+            raise KeyError(name)
+        return {self.graph.person_ids[person] for person in people}
+
+    def __iter__(self):
+        previous = None
+        for person in self.graph.name_order:
+            name = self.graph.lower_name(person)
+            if name != previous:
+                yield name
+                previous = name
+        for name, people in self.graph.extra_names.items():
+            # Only names that no one had when the order was built
+            if self.graph.people_named(name) == people:
+                yield name
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+def read_chunks(path, columns, start=None, report=None):
+    """
+    Yields the rows of the CSV file at `path` in lists of up to CHUNK_ROWS,
+    keeping only the named `columns` of each row, in that order.
+
+    If `start` is given, only rows from that byte offset on are read.
+
+    Blank lines are skipped, as csv.DictReader does, and so are rows too
+    short to have every column, which are counted in `report`, if given.
+    """
+    with open(path, "rb") as raw:
+        header = next(csv.reader([raw.readline().decode("utf-8")]), [])
+        positions = [header.index(column) for column in columns]
+        width = max(positions) + 1
+        if start is not None:
+            raw.seek(start)
+        f = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+        reader = csv.reader(f)
+        while True:
+            chunk = list(islice(reader, CHUNK_ROWS))
+            if not chunk:
+                return
+            rows = [tuple(row[i] for i in positions) for row in chunk if len(row) >= width]
+            if report is not None and len(rows) != len(chunk):
+                short = sum(1 for row in chunk if row and len(row) < width)
+                if short:
+                    name = os.path.basename(path)
+                    report.short_rows[name] = report.short_rows.get(name, 0) + short
+            yield rows
+
+
+def count_lines(path):
+    """
+    Returns an upper bound on the number of data rows in the CSV file
+    at `path`, from its count of line breaks.
+    """
+    lines = 1
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            lines += block.count(b"\n")
+    return lines
+
+
+def parse_year(text):
+    """
+    Returns a year from a CSV field as an integer, or 0 if it is missing.
+    """
+    return int(text) if text.isdigit() else 0
+
+
+def format_year(year):
+    """
+    Returns a year as the CSV field it was read from.
+    """
+    return str(year) if year else ""
+
+
+def peak_rss():
+    """
+    Returns the peak resident memory of this process in bytes, or None
+    if it cannot be measured here.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def find(parent, item):
+    """
+    Returns the representative of `item` in the union-find forest
+    `parent`, halving the path to it along the way.
+    """
+    while parent[item] != item:
+        parent[item] = parent[parent[item]]
+        item = parent[item]
+    return item
+
+
+def union(parent, size, a, b):
+    """
+    Merges the sets holding `a` and `b` in the union-find forest `parent`,
+    hanging the smaller set under the larger.
+    """
+    a = find(parent, a)
+    b = find(parent, b)
+    if a == b:
+        return
+    if size[a] < size[b]:
+        a, b = b, a
+    parent[b] = a
+    size[a] += size[b]
+
+
+def group_edges(rows, columns, row_count, unique=False):
+    """
+    Groups parallel arrays of (row, column) pairs by row, returning the
+    (offsets, columns) arrays of their compressed sparse row form.
+
+    If `unique` is True, columns within a row are sorted and duplicate
+    pairs are dropped.
+    """
+    # Counting how many pairs fall in each row
+    offsets = array("q", bytes(8 * (row_count + 1)))
+    for row in rows:
+        offsets[row + 1] += 1
+    for row in range(row_count):
+        offsets[row + 1] += offsets[row]
+
+    # Placing each column in the next free slot of its row
+    grouped = array("i", bytes(4 * len(rows)))
+    free = array("q", offsets)
+    for row, column in zip(rows, columns):
+        grouped[free[row]] = column
+        free[row] += 1
+
+    if not unique:
+        return offsets, grouped
+
+    # Compacting each row down to its sorted distinct columns
+    start = end = 0
+    for row in range(row_count):
+        stop = offsets[row + 1]
+        distinct = sorted(set(grouped[start:stop]))
+        grouped[end:end + len(distinct)] = array("i", distinct)
+        end += len(distinct)
+        offsets[row + 1] = end
+        start = stop
+    del grouped[end:]
+    return offsets, grouped
+
+
+def expand_offsets(offsets):
+    """
+    Returns an array holding, for every slot of a compressed sparse row
+    structure, the row that slot belongs to.
+    """
+    rows = array("i")
+    for row in range(len(offsets) - 1):
+        rows.extend([row] * (offsets[row + 1] - offsets[row]))
+    return rows
+
+
+def sorted_indices(values, key=None):
+    """
+    Returns an array of the indices of `values`, ordered by value.
+    """
+    if key is None:
+        order = sorted(range(len(values)), key=values.__getitem__)
+    else:
+        order = sorted(range(len(values)), key=lambda i: key(values[i]))
+    return array("i", order)
+
+
+def find_index(order, values, value):
+    """
+    Binary searches `order`, a sorted index over `values`, for `value`.
+    Returns its index in `values`, or None if it is not there.
+    """
+    i = bisect_left(order, value, key=values.__getitem__)
+    if i < len(order) and values[order[i]] == value:
+        return order[i]
+    return None
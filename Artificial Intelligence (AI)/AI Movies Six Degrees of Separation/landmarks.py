@@ -0,0 +1,208 @@
+import json
+import math
+import mmap
+import struct
+from array import array
+
+# Name of the landmark index file written next to the CSV files
+LANDMARKS_NAME = "degrees.landmarks"
+
+# Distance stored for people a landmark cannot reach
+UNREACHABLE = 255
+
+# Bumped whenever the layout of a landmark index changes
+VERSION = 2
+
+MAGIC = b"DEGLMRK\0"
+HEADER = struct.Struct("<8sIIqqI")
+
+
+class LandmarkIndex():
+    """
+    Breadth-first distances from a handful of well-connected "landmark"
+    people to everyone else.
+
+    Because the graph is undirected, the triangle inequality turns these
+    into bounds on the distance between any two people:
+    |d(L, s) - d(L, t)| <= d(s, t) <= d(L, s) + d(L, t) for every landmark L.
+
+    Distances are stored person-major, one byte per landmark, so that the
+    distances of person `p` are `distances[p * count:(p + 1) * count]`.
+
+    `sources` are the fingerprints of the CSV files the graph was loaded
+    from (see snapshot.fingerprint), or None if they are not known.
+    """
+
+    def __init__(self, landmarks, distances, edge_count, sources):
+        self.landmarks = landmarks
+        self.distances = distances
+        self.count = len(landmarks)
+        self.edge_count = edge_count
+        self.sources = sources
+
+    def row(self, person):
+        """Returns the distances from every landmark to `person`."""
+        return self.distances[person * self.count:(person + 1) * self.count]
+
+    def bounds(self, source, target):
+        """
+        Returns (lower, upper) bounds on the distance between the source
+        and target indices. The lower bound is math.inf if some landmark
+        proves they are not connected, and the upper bound is math.inf if
+        no landmark reaches both.
+        """
+        lower = 0
+        upper = math.inf
+        for a, b in zip(self.row(source), self.row(target)):
+            if a == UNREACHABLE and b == UNREACHABLE:
+                continue
+            if a == UNREACHABLE or b == UNREACHABLE:
+                return math.inf, math.inf
+            lower = max(lower, abs(a - b))
+            upper = min(upper, a + b)
+        return lower, upper
+
+    def heuristic(self, target):
+        """
+        Returns a function giving a lower bound on the distance from any
+        person index to `target`, for guiding A* search. People who cannot
+        reach `target` get math.inf.
+        """
+        target_row = self.row(target)
+        count = self.count
+        distances = self.distances
+
+        def estimate(person):
+            best = 0
+            row = distances[person * count:(person + 1) * count]
+            for a, b in zip(row, target_row):
+                if a == UNREACHABLE or b == UNREACHABLE:
+                    if a != b:
+                        return math.inf
+                elif a - b > best:
+                    best = a - b
+                elif b - a > best:
+                    best = b - a
+            return best
+
+        return estimate
+
+    def save(self, path):
+        """
+        Write the index to the file at `path`.
+        """
+        manifest = json.dumps({"sources": self.sources}).encode("utf-8")
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(
+                MAGIC, VERSION, self.count,
+                len(self.distances) // max(self.count, 1), self.edge_count,
+                len(manifest)
+            ))
+            f.write(manifest)
+            f.write(bytes(padded(f.tell()) - f.tell()))
+            f.write(array("i", self.landmarks).tobytes())
+            f.write(self.distances)
+
+    def matches(self, graph):
+        """
+        Returns True if the index was built from the same CSV files as
+        `graph` and from a graph the same size, so that rows rewired
+        without changing the row counts are caught as well as added ones.
+        """
+        if self.sources is None or graph.sources is None:
+            return False
+        for name, recorded in self.sources.items():
+            # Touching a file changes its mtime but not its contents
+            current = graph.sources.get(name)
+            if current is None or (
+                current["size"] != recorded["size"]
+                or current["sha256"] != recorded["sha256"]
+            ):
+                return False
+        people = len(self.distances) // max(self.count, 1)
+        return (
+            people == len(graph.person_ids)
+            and self.edge_count == graph.star_count()
+        )
+
+
+def build(graph, count=16):
+    """
+    Returns a LandmarkIndex over `graph` using its `count` people with
+    the most co-star links as landmarks.
+    """
+    people = len(graph.person_ids)
+    landmarks = most_connected(graph, count)
+    distances = bytearray(len(landmarks) * people)
+    for i, landmark in enumerate(landmarks):
+        distances[i::len(landmarks)] = distances_from(graph, landmark)
+    return LandmarkIndex(landmarks, distances, graph.star_count(), graph.sources)
+
+
+def load(path):
+    """
+    Memory-map the landmark index in the file at `path`. Returns None if
+    the file is missing or is not a landmark index of this version.
+    """
+    try:
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    if len(mapped) < HEADER.size:
+        return None
+    magic, version, count, people, edge_count, length = HEADER.unpack_from(mapped)
+    if magic != MAGIC or version != VERSION:
+        return None
+    end = HEADER.size + length
+    try:
+        manifest = json.loads(mapped[HEADER.size:end].decode("utf-8"))
+    except ValueError:
+        return None
+
+    view = memoryview(mapped)
+    start = padded(end)
+    landmarks = view[start:start + 4 * count].cast("i")
+    start += 4 * count
+    distances = view[start:start + count * people]
+    return LandmarkIndex(landmarks, distances, edge_count, manifest["sources"])
+
+
+def most_connected(graph, count):
+    """
+    Returns the indices of the `count` people with the most co-star links,
+    counting a co-star once per shared movie.
+    """
+    cast_sizes = [graph.cast_size(movie) for movie in range(len(graph.movie_ids))]
+    links = [
+        sum(cast_sizes[movie] - 1 for movie in graph.movies_of(person))
+        for person in range(len(graph.person_ids))
+    ]
+    ranked = sorted(range(len(links)), key=links.__getitem__, reverse=True)
+    return ranked[:count]
+
+
+def distances_from(graph, source):
+    """
+    Returns a bytearray of the breadth-first distance from `source` to
+    every person, with UNREACHABLE for people it cannot reach.
+    """
+    distances = bytearray([UNREACHABLE]) * len(graph.person_ids)
+    distances[source] = 0
+    level = [source]
+    depth = 0
+    while level and depth + 1 < UNREACHABLE:
+        depth += 1
+        next_level = []
+        for person in level:
+            for _, neighbor in graph.neighbors(person):
+                if distances[neighbor] == UNREACHABLE:
+                    distances[neighbor] = depth
+                    next_level.append(neighbor)
+        level = next_level
+    return distances
+
+
+def padded(size):
+    """Rounds `size` up to the next multiple of 8."""
+    return (size + 7) & ~7
@@ -0,0 +1,193 @@
+import heapq
+from bisect import bisect_left, bisect_right
+from itertools import chain
+
+# Sorts after any character that can appear in a name
+LAST_CHARACTER = "\U0010ffff"
+
+# Prefixes matching at most this many people are ranked by scanning them all
+SCAN_LIMIT = 256
+
+# How many of the top-ranked people are kept for each longer prefix
+RANKED_LIMIT = 50
+
+
+class NameIndex():
+    """
+    Name lookups over the people of a Graph, without blocking for input.
+
+    The graph's `name_order` lists every person sorted by lower-cased name,
+    which makes it an implicit trie: the people whose names start with a
+    given prefix always form one contiguous run of it. Exact and prefix
+    lookups are binary searches, and fuzzy lookups walk that trie, pruning
+    every branch whose edit distance already exceeds the limit.
+
+    People added since the order was built are matched separately, by
+    scanning the graph's small `extra_names` overlay.
+
+    All results are person indices, ranked by how many movies each person
+    starred in.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+        # The top-ranked people of each run of `name_order` too long to
+        # scan, by (start, end), and the (name order, credit count) they
+        # were ranked under
+        self.ranked = dict()
+        self.ranked_for = None
+
+    def movie_count(self, person):
+        """Returns the number of movies `person` starred in."""
+        return self.graph.movie_count(person)
+
+    def exact(self, name):
+        """
+        Returns every person named `name`, ignoring case.
+        """
+        people = self.graph.people_named(name)
+        return sorted(people, key=self.movie_count, reverse=True)
+
+    def prefix(self, prefix, limit=10):
+        """
+        Returns up to `limit` people whose names start with `prefix`,
+        ignoring case.
+
+        A prefix matching more than SCAN_LIMIT people is ranked in full the
+        first time it is looked up, which takes time in proportion to how
+        many it matches (tens of milliseconds for a one-letter prefix over
+        a million people), and its top RANKED_LIMIT people are kept, so
+        later lookups of it with `limit` up to that take microseconds.
+        """
+        key = prefix.lower()
+        order = self.graph.name_order
+        lower_name = self.graph.lower_name
+        start = bisect_left(order, key, key=lower_name)
+        end = bisect_left(order, key + LAST_CHARACTER, lo=start, key=lower_name)
+        matched = self.candidates(start, end, limit)
+        added = [
+            person
+            for name, people in self.graph.extra_names.items()
+            if name.startswith(key)
+            for person in people
+        ]
+        return heapq.nlargest(limit, chain(matched, added), key=self.movie_count)
+
+    def candidates(self, start, end, limit):
+        """
+        Returns people of the run of `name_order` from `start` to `end`
+        that include its `limit` people with the most movies: all of them
+        for a short run, and its kept top-ranked people for a long one.
+        """
+        if end - start <= SCAN_LIMIT or limit > RANKED_LIMIT:
+            order = self.graph.name_order
+            return (order[i] for i in range(start, end))
+        return self.top_ranked(start, end)
+
+    def top_ranked(self, start, end):
+        """
+        Returns the RANKED_LIMIT people with the most movies in the run of
+        `name_order` from `start` to `end`, ranking them only if the graph
+        has changed since.
+        """
+        # New credits change movie counts, and a reload changes the order
+        version = (self.graph.name_order, self.graph.star_count())
+        if self.ranked_for is None or (
+            self.ranked_for[0] is not version[0]
+            or self.ranked_for[1] != version[1]
+        ):
+            self.ranked = dict()
+            self.ranked_for = version
+        if (start, end) not in self.ranked:
+            order = self.graph.name_order
+            self.ranked[start, end] = heapq.nlargest(
+                RANKED_LIMIT, (order[i] for i in range(start, end)),
+                key=self.movie_count
+            )
+        return self.ranked[start, end]
+
+    def fuzzy(self, name, max_distance=2, limit=10):
+        """
+        Returns up to `limit` people whose names are within `max_distance`
+        insertions, deletions or substitutions of `name`, ignoring case.
+        Closer names come first.
+
+        This is not a constant-time lookup: every trie node still within
+        `max_distance` costs a binary search of `name_order`, so the time
+        grows with how many distinct names are near `name` and with the
+        logarithm of the number of people. On a million generated people
+        a lookup takes from about 3 to 20 milliseconds.
+        """
+        word = name.lower()
+        order = self.graph.name_order
+        matches = []
+
+        # Binary searches of nested runs probe many of the same people
+        names = dict()
+
+        def lower_name(person):
+            name = names.get(person)
+            if name is None:
+                name = names[person] = self.graph.lower_name(person)
+            return name
+
+        # Each entry is a trie node: its prefix, the run of `order` holding
+        # names with that prefix, and the edit distances from every prefix
+        # of `word` to it
+        stack = [("", 0, len(order), list(range(len(word) + 1)))]
+        while stack:
+            prefix, start, end, row = stack.pop()
+            depth = len(prefix)
+
+            # Names equal to the prefix itself sort first in the run
+            if start < end and len(lower_name(order[start])) == depth:
+                stop = bisect_right(order, prefix, lo=start, hi=end, key=lower_name)
+                if row[-1] <= max_distance:
+                    matches.extend(
+                        (row[-1], person)
+                        for person in self.candidates(start, stop, limit)
+                    )
+                start = stop
+
+            # Splitting the rest of the run by its next character
+            def branch(person):
+                return lower_name(person)[:depth + 1]
+
+            while start < end:
+                character = lower_name(order[start])[depth]
+                stop = bisect_right(
+                    order, prefix + character, lo=start, hi=end, key=branch
+                )
+                next_row = [row[0] + 1]
+                for i, letter in enumerate(word, start=1):
+                    next_row.append(min(
+                        next_row[i - 1] + 1,
+                        row[i] + 1,
+                        row[i - 1] + (letter != character)
+                    ))
+                if min(next_row) <= max_distance:
+                    stack.append((prefix + character, start, stop, next_row))
+                start = stop
+
+        for added, people in self.graph.extra_names.items():
+            distance = edit_distance(word, added)
+            if distance <= max_distance:
+                matches.extend((distance, person) for person in people)
+
+        matches.sort(key=lambda match: (match[0], -self.movie_count(match[1])))
+        return [person for _, person in matches[:limit]]
+
+
+def edit_distance(a, b):
+    """
+    Returns the Levenshtein distance between strings `a` and `b`.
+    """
+    row = list(range(len(b) + 1))
+    for i, letter in enumerate(a, start=1):
+        previous, row[0] = row[0], i
+        for j, other in enumerate(b, start=1):
+            previous, row[j] = row[j], min(
+                row[j] + 1, row[j - 1] + 1, previous + (letter != other)
+            )
+    return row[-1]
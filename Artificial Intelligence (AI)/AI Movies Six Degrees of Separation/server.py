@@ -0,0 +1,146 @@
+import argparse
+from functools import lru_cache
+
+from flask import Flask, jsonify, request
+
+import degrees
+
+app = Flask(__name__)
+
+# Number of distinct person pairs whose paths are kept in memory
+CACHE_SIZE = 100_000
+
+
+def load(directory):
+    """
+    Load the data the service answers queries from, and empty the cache.
+    """
+    degrees.load_data(directory)
+    cached_path.cache_clear()
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def cached_path(first, second):
+    """
+    Returns the shortest path from `first` to `second`, two person_ids
+    with `first` <= `second`, so that each unordered pair is cached once.
+    """
+    path = degrees.shortest_path(first, second)
+    return None if path is None else tuple(path)
+
+
+def reverse_path(source, path):
+    """
+    Returns `path`, which leads away from `source`, walked the other way.
+    """
+    people = [source] + [person_id for _, person_id in path]
+    people.reverse()
+    movies = [movie_id for movie_id, _ in reversed(path)]
+    return list(zip(movies, people[1:]))
+
+
+def describe_person(person_id):
+    """
+    Returns a JSON-ready summary of a person_id.
+    """
+    person = degrees.people[person_id]
+    return {
+        "id": person_id,
+        "name": person["name"],
+        "birth": person["birth"],
+        "movies": len(person["movies"])
+    }
+
+
+@app.route("/path")
+def path():
+    source = request.args.get("source", "")
+    target = request.args.get("target", "")
+    for person_id in (source, target):
+        if person_id not in degrees.people:
+            return jsonify({"error": f"unknown person: {person_id}"}), 404
+
+    if source <= target:
+        found = cached_path(source, target)
+    else:
+        found = cached_path(target, source)
+        if found is not None:
+            found = reverse_path(target, found)
+
+    if found is None:
+        return jsonify({"source": source, "target": target, "degrees": None, "path": None})
+    return jsonify({
+        "source": source,
+        "target": target,
+        "degrees": len(found),
+        "path": [
+            {"movie_id": movie_id, "person_id": person_id}
+            for movie_id, person_id in found
+        ]
+    })
+
+
+@app.route("/person")
+def person():
+    name = request.args.get("name", "")
+    match = request.args.get("match", "exact")
+    limit = request.args.get("limit", 10, type=int)
+    if match == "exact":
+        person_ids = degrees.person_ids_for_name(name)[:limit]
+    elif match == "prefix":
+        person_ids = degrees.complete_name(name, limit)
+    elif match == "fuzzy":
+        distance = request.args.get("distance", 2, type=int)
+        person_ids = degrees.similar_names(name, distance, limit)
+    else:
+        return jsonify({"error": f"unknown match: {match}"}), 400
+    return jsonify({"people": [describe_person(person_id) for person_id in person_ids]})
+
+
+@app.route("/neighbors")
+def neighbors():
+    person_id = request.args.get("id", "")
+    if person_id not in degrees.people:
+        return jsonify({"error": f"unknown person: {person_id}"}), 404
+    pairs = sorted(degrees.neighbors_for_person(person_id))
+    return jsonify({
+        "id": person_id,
+        "neighbors": [
+            {"movie_id": movie_id, "person_id": neighbor_id}
+            for movie_id, neighbor_id in pairs
+            if neighbor_id != person_id
+        ]
+    })
+
+
+@app.route("/metrics")
+def metrics():
+    info = cached_path.cache_info()
+    lookups = info.hits + info.misses
+    return jsonify({
+        "cache_hits": info.hits,
+        "cache_misses": info.misses,
+        "cache_hit_rate": info.hits / lookups if lookups else None,
+        "cache_size": info.currsize,
+        "cache_max_size": info.maxsize
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve degrees of separation queries over HTTP."
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument(
+        "--debug", action="store_true",
+        help="run Flask in debug mode, with its interactive debugger; "
+             "only for local development"
+    )
+    args = parser.parse_args()
+
+    load(args.directory)
+    app.run(debug=args.debug, use_reloader=False)
+
+
+if __name__ == "__main__":
+    main()
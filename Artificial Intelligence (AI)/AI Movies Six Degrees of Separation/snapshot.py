@@ -0,0 +1,380 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from itertools import accumulate
+
+from graph import read_chunks
+
+# Name of the snapshot file written next to the CSV files
+SNAPSHOT_NAME = "degrees.snapshot"
+
+# Name of the file of additions made since the snapshot was written
+JOURNAL_NAME = "degrees.snapshot.journal"
+
+# Bumped whenever the layout of a snapshot changes
+VERSION = 3
+
+MAGIC = b"DEGREES\0"
+HEADER = struct.Struct("<8sII")
+
+# CSV files a snapshot is built from, and so must be checked against
+SOURCES = ("people.csv", "movies.csv", "stars.csv")
+
+# Graph attributes stored as raw arrays
+ARRAYS = (
+    "person_births", "movie_years",
+    "person_offsets", "person_movies", "movie_offsets", "movie_stars",
+    "person_order", "movie_order", "name_order",
+    "component", "component_size"
+)
+
+# Graph attributes stored as string tables
+STRINGS = ("person_ids", "person_names", "movie_ids", "movie_titles")
+
+
+class StringTable():
+    """
+    Sequence of strings kept as one UTF-8 buffer plus an array of offsets,
+    so that it can live in a memory-mapped file. Strings appended later
+    are kept in a plain list after the buffer's.
+    """
+
+    def __init__(self, data, offsets):
+        self.data = data
+        self.offsets = offsets
+        self.appended = []
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("string table index out of range")
+        if i >= len(self.offsets) - 1:
+            return self.appended[i - len(self.offsets) + 1]
+        return str(self.data[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def __len__(self):
+        return len(self.offsets) - 1 + len(self.appended)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def append(self, value):
+        self.appended.append(value)
+
+
+class Journal():
+    """
+    Append-only file of the additions made to a graph since its snapshot
+    was written, one JSON list per line, replayed whenever the snapshot
+    is loaded.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def record(self, entry):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+
+    def entries(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+        except FileNotFoundError:
+            return
+
+
+def save(graph, directory):
+    """
+    Write a snapshot of `graph`, loaded from the CSV files in `directory`,
+    to the snapshot file in that same directory, and start a new journal
+    for the additions made to it from now on.
+    """
+    graph.compact()
+    sources = {
+        name: fingerprint(os.path.join(directory, name))
+        for name in SOURCES
+    }
+
+    # Laying out every section one after the other, 8-byte aligned
+    buffers = []
+    for name in ARRAYS:
+        values = getattr(graph, name)
+        buffers.append((name, memoryview(values).format, values))
+    for name in STRINGS:
+        encoded = [value.encode("utf-8") for value in getattr(graph, name)]
+        offsets = array("q", [0])
+        offsets.extend(accumulate(len(value) for value in encoded))
+        buffers.append((f"{name}.offsets", "q", offsets))
+        buffers.append((f"{name}.data", "B", b"".join(encoded)))
+
+    sections = {}
+    position = 0
+    for name, typecode, values in buffers:
+        size = len(memoryview(values).cast("B"))
+        sections[name] = {
+            "typecode": typecode, "offset": position, "size": size
+        }
+        position += padded(size)
+
+    manifest = json.dumps({
+        "byteorder": sys.byteorder,
+        "itemsizes": {code: array(code).itemsize for code in "BHiq"},
+        "sources": sources,
+        "sections": sections
+    }).encode("utf-8")
+
+    # Writing to a temporary file first so readers never see half a snapshot
+    path = os.path.join(directory, SNAPSHOT_NAME)
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(manifest)))
+        f.write(manifest)
+        f.write(bytes(padded(f.tell()) - f.tell()))
+        for _, _, values in buffers:
+            data = memoryview(values).cast("B")
+            f.write(data)
+            f.write(bytes(padded(len(data)) - len(data)))
+    os.replace(temporary, path)
+
+    journal = os.path.join(directory, JOURNAL_NAME)
+    if os.path.exists(journal):
+        os.remove(journal)
+    graph.sources = sources
+    graph.journal = Journal(journal)
+
+
+def load(graph, directory):
+    """
+    Memory-map the snapshot in `directory` into `graph`, then replay its
+    journal and add any rows appended to the CSV files since.
+
+    Returns True if the snapshot was loaded, or False if there is no
+    snapshot or the CSV files have changed other than by having rows
+    appended to them.
+    """
+    path = os.path.join(directory, SNAPSHOT_NAME)
+    try:
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return False
+
+    manifest, base = read_manifest(mapped)
+    if manifest is None or not is_compatible(manifest):
+        mapped.close()
+        return False
+
+    view = memoryview(mapped)
+
+    def section(name):
+        entry = manifest["sections"][name]
+        start = base + entry["offset"]
+        return view[start:start + entry["size"]].cast(entry["typecode"])
+
+    graph.clear()
+    for name in ARRAYS:
+        setattr(graph, name, section(name))
+    for name in STRINGS:
+        table = StringTable(section(f"{name}.data"), section(f"{name}.offsets"))
+        setattr(graph, name, table)
+    graph.mapping = mapped
+
+    # Replaying the additions made since the snapshot was written
+    journal = Journal(os.path.join(directory, JOURNAL_NAME))
+    graph.sources = manifest["sources"]
+    for entry in journal.entries():
+        if entry[0] == "sources":
+            graph.sources = entry[1]
+        else:
+            apply_entry(graph, entry)
+    graph.journal = journal
+
+    if not refresh(graph, directory):
+        graph.clear()
+        return False
+    return True
+
+
+def refresh(graph, directory):
+    """
+    Add the rows appended to the CSV files in `directory` since `graph`
+    was loaded from them, in time proportional to the number of new rows.
+
+    Returns False, changing nothing, if the graph does not know what it
+    was loaded from or any file has changed other than by growing.
+    """
+    if graph.sources is None:
+        return False
+
+    changed = {}
+    for name in SOURCES:
+        path = os.path.join(directory, name)
+        status = compare(path, graph.sources[name])
+        if status is None:
+            return False
+        if status != graph.sources[name]:
+            changed[name] = status
+    if not changed:
+        return True
+    grown = {
+        name for name, status in changed.items()
+        if status["size"] != graph.sources[name]["size"]
+    }
+
+    # People and movies first, so new stars can refer to them
+    if "people.csv" in grown:
+        start = graph.sources["people.csv"]["size"]
+        columns = ("id", "name", "birth")
+        for chunk in read_chunks(os.path.join(directory, "people.csv"), columns, start):
+            for person_id, name, birth in chunk:
+                graph.add_person(person_id, name, birth)
+    if "movies.csv" in grown:
+        start = graph.sources["movies.csv"]["size"]
+        columns = ("id", "title", "year")
+        for chunk in read_chunks(os.path.join(directory, "movies.csv"), columns, start):
+            for movie_id, title, year in chunk:
+                graph.add_movie(movie_id, title, year)
+    if "stars.csv" in grown:
+        start = graph.sources["stars.csv"]["size"]
+        columns = ("person_id", "movie_id")
+        for chunk in read_chunks(os.path.join(directory, "stars.csv"), columns, start):
+            for person_id, movie_id in chunk:
+                try:
+                    graph.add_star(person_id, movie_id)
+                except KeyError:
+                    # Rows naming unknown ids are skipped, as in a full load
+                    pass
+
+    # Recording touched files' new times too, so they are not hashed again
+    graph.sources = dict(graph.sources, **changed)
+    if graph.journal is not None:
+        try:
+            graph.journal.record(["sources", graph.sources])
+        except OSError:
+            # Only new times are lost, if no rows were added
+            if grown:
+                raise
+    return True
+
+
+def apply_entry(graph, entry):
+    """
+    Make the addition described by a journal entry to `graph`.
+    """
+    kind, *fields = entry
+    if kind == "person":
+        graph.add_person(*fields)
+    elif kind == "movie":
+        graph.add_movie(*fields)
+    elif kind == "star":
+        graph.add_star(*fields)
+    else:
+        raise ValueError(f"unknown journal entry: {kind}")
+
+
+def read_manifest(mapped):
+    """
+    Returns the manifest of a mapped snapshot and the position its sections
+    start at, or (None, None) if it is not a snapshot of this version.
+    """
+    if len(mapped) < HEADER.size:
+        return None, None
+    magic, version, length = HEADER.unpack_from(mapped)
+    if magic != MAGIC or version != VERSION:
+        return None, None
+    end = HEADER.size + length
+    try:
+        manifest = json.loads(mapped[HEADER.size:end].decode("utf-8"))
+    except ValueError:
+        return None, None
+    return manifest, padded(end)
+
+
+def is_compatible(manifest):
+    """
+    Returns True if a snapshot with `manifest` can be used on this machine.
+    """
+    if manifest["byteorder"] != sys.byteorder:
+        return False
+    for code, size in manifest["itemsizes"].items():
+        if array(code).itemsize != size:
+            return False
+    return True
+
+
+def compare(path, recorded):
+    """
+    Compares the file at `path` with its `recorded` fingerprint.
+
+    Returns `recorded` itself if the file is unchanged, a new fingerprint
+    if the file has only been touched or had data appended to it, or None
+    if it has otherwise changed or is missing.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    if stat.st_size == recorded["size"] and stat.st_mtime_ns == recorded["mtime_ns"]:
+        return recorded
+    if stat.st_size < recorded["size"]:
+        return None
+
+    # A file that was touched but not changed still matches its hash, and
+    # one that grew still matches it up to its old size
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        remaining = recorded["size"]
+        while remaining:
+            block = f.read(min(remaining, 1 << 20))
+            if not block:
+                return None
+            digest.update(block)
+            remaining -= len(block)
+        if digest.hexdigest() != recorded["sha256"]:
+            return None
+        if stat.st_size == recorded["size"]:
+            return dict(recorded, mtime_ns=stat.st_mtime_ns)
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return {
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "sha256": digest.hexdigest()
+    }
+
+
+def fingerprint(path):
+    """
+    Returns the modification time, size and hash of the file at `path`.
+    """
+    stat = os.stat(path)
+    return {
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "sha256": file_hash(path)
+    }
+
+
+def file_hash(path):
+    """
+    Returns the SHA-256 hex digest of the file at `path`.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def padded(size):
+    """Rounds `size` up to the next multiple of 8."""
+    return (size + 7) & ~7
@@ -1,3 +1,7 @@
+import time
+from collections import deque
+
+
 class Node():
     def __init__(self, state, parent, action):
         self.state = state
@@ -36,3 +40,157 @@ class QueueFrontier(StackFrontier):
             node = self.frontier[0]
             self.frontier = self.frontier[1:]
             return node
+
+
+class DequeStackFrontier():
+    """
+    Stack frontier backed by a deque, with a count of the states it holds
+    so that `add`, `remove` and `contains_state` all take constant time.
+
+    Also counts pushes, pops, membership checks and the peak size, so
+    that different search runs can be compared.
+    """
+
+    def __init__(self):
+        self.frontier = deque()
+        self.states = {}
+        self.pushes = 0
+        self.pops = 0
+        self.membership_checks = 0
+        self.peak_size = 0
+
+    def add(self, node):
+        self.frontier.append(node)
+        self.states[node.state] = self.states.get(node.state, 0) + 1
+        self.pushes += 1
+        if len(self.frontier) > self.peak_size:
+            self.peak_size = len(self.frontier)
+
+    def contains_state(self, state):
+        self.membership_checks += 1
+        return state in self.states
+
+    def empty(self):
+        return len(self.frontier) == 0
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = self.take()
+            self.pops += 1
+            if self.states[node.state] == 1:
+                del self.states[node.state]
+            else:
+                self.states[node.state] -= 1
+            return node
+
+    def take(self):
+        return self.frontier.pop()
+
+    def counters(self):
+        return {
+            "pushes": self.pushes,
+            "pops": self.pops,
+            "membership_checks": self.membership_checks,
+            "peak_size": self.peak_size
+        }
+
+
+class DequeQueueFrontier(DequeStackFrontier):
+
+    def take(self):
+        return self.frontier.popleft()
+
+
+class SearchStats():
+    """
+    What one search did, filled in by the search it is passed to as
+    `stats`: people expanded, neighbors generated, neighbors rejected
+    because they reached no new person, the peak frontier size, the
+    deepest level expanded and the wall time spent on each level.
+
+    Searches only touch it once per person expanded, and not at all when
+    they are given None, so leaving it off costs nothing.
+    """
+
+    def __init__(self):
+        self.method = None
+        self.nodes_expanded = 0
+        self.neighbors_generated = 0
+        self.duplicates_rejected = 0
+        self.peak_frontier = 0
+        self.depth = 0
+        self.level_seconds = []
+        self.seconds = 0.0
+        self.started = None
+        self.level_started = None
+
+    def start(self, method):
+        self.method = method
+        self.started = self.level_started = time.perf_counter()
+
+    def counted(self, neighbors):
+        """
+        Returns a version of a graph's `neighbors` method that counts the
+        neighbors it generates.
+        """
+        def counting(person, allowed=None):
+            for neighbor in neighbors(person, allowed):
+                self.neighbors_generated += 1
+                yield neighbor
+        return counting
+
+    def expand(self, depth, frontier_size, count=1):
+        """
+        Records that `count` people at `depth` are being expanded while
+        the frontier holds `frontier_size` of them.
+        """
+        self.nodes_expanded += count
+        if frontier_size > self.peak_frontier:
+            self.peak_frontier = frontier_size
+        while self.depth < depth:
+            # Entering a deeper level ends the time spent on this one
+            now = time.perf_counter()
+            self.level_seconds.append(now - self.level_started)
+            self.level_started = now
+            self.depth += 1
+
+    def finish(self, reached):
+        """
+        Records the end of the search, which reached `reached` people
+        besides the ones it started from.
+        """
+        now = time.perf_counter()
+        self.level_seconds.append(now - self.level_started)
+        self.seconds = now - self.started
+        self.duplicates_rejected = self.neighbors_generated - reached
+
+    def as_dict(self):
+        return {
+            "method": self.method,
+            "nodes_expanded": self.nodes_expanded,
+            "neighbors_generated": self.neighbors_generated,
+            "duplicates_rejected": self.duplicates_rejected,
+            "peak_frontier": self.peak_frontier,
+            "depth": self.depth,
+            "level_seconds": self.level_seconds,
+            "seconds": self.seconds
+        }
+
+    def lines(self):
+        """
+        Returns the stats as a list of human-readable lines.
+        """
+        if self.started is None:
+            return ["No search was needed."]
+        lines = [
+            f"Search: {self.method} in {self.seconds * 1000:.3f}ms",
+            f"Expanded {self.nodes_expanded} people, generated "
+            f"{self.neighbors_generated} neighbors, rejected "
+            f"{self.duplicates_rejected} already reached.",
+            f"Peak frontier: {self.peak_frontier}, depth reached: {self.depth}"
+        ]
+        for depth, seconds in enumerate(self.level_seconds):
+            lines.append(f"Level {depth}: {seconds * 1000:.3f}ms")
+        return lines